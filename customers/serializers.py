@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from orderflow.fieldsets import SparseFieldsetMixin
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from .models import Customer, Admin
@@ -61,7 +62,7 @@ class CustomerLoginSerializer(serializers.Serializer):
         return attrs
 
 
-class CustomerSerializer(serializers.ModelSerializer):
+class CustomerSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for customer profile"""
     full_name = serializers.ReadOnlyField()
     
@@ -1,12 +1,16 @@
 from django.conf import settings
-from django.core.mail import send_mail
 from django.utils import timezone
 from customers.models import Admin, Customer
 from .models import Notification
+from .mail import send_pooled_email
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Admin addresses per message; providers commonly cap recipients per message
+ADMIN_EMAIL_BATCH_SIZE = 50
+
+
 class AdminService:
     """Service for managing admin notifications and system operations"""
     
@@ -15,16 +19,21 @@ class AdminService:
     
     def get_active_admins(self):
         """Get all active admin users"""
-        return Admin.objects.filter(is_active=True, user__is_active=True)
+        return Admin.objects.filter(is_active=True, user__is_active=True).select_related('user')
     
     def get_admin_emails(self):
         """Get all active admin email addresses"""
-        return [admin.user.email for admin in self.get_active_admins()]
+        return list(self.get_active_admins().values_list('user__email', flat=True))
     
     def send_admin_notification(self, subject, message, notification_type='admin', order=None):
         """
         Send notification to all active admins
         
+        Admins are mailed in batches of ADMIN_EMAIL_BATCH_SIZE recipients, one
+        message per batch over the pooled connection. Admins are blind copied
+        so no admin sees the others' addresses, and every admin's sent or
+        failed notification is recorded with a single bulk insert.
+        
         Args:
             subject (str): Email subject
             message (str): Email message
@@ -34,9 +43,9 @@ class AdminService:
         Returns:
             dict: Results of sending notifications
         """
-        admin_emails = self.get_admin_emails()
+        admins = list(self.get_active_admins())
         
-        if not admin_emails:
+        if not admins:
             logger.warning("No active admin emails found")
             return {
                 'success': False,
@@ -44,53 +53,57 @@ class AdminService:
             }
         
         results = []
-        success_count = 0
+        notifications = []
+        sent_at = timezone.now()
         
-        for admin_email in admin_emails:
+        for start in range(0, len(admins), ADMIN_EMAIL_BATCH_SIZE):
+            batch = admins[start:start + ADMIN_EMAIL_BATCH_SIZE]
+            admin_emails = [admin.user.email for admin in batch]
+            
             try:
-                # Send email
-                result = send_mail(
+                result = send_pooled_email(
                     subject=subject,
                     message=message,
+                    recipients=[self.from_email] if self.from_email else [],
                     from_email=self.from_email,
-                    recipient_list=[admin_email],
-                    fail_silently=False
+                    bcc=admin_emails
                 )
-                
-                if result:
-                    success_count += 1
-                    logger.info(f"Admin notification sent to {admin_email}")
-                    
-                    # Create notification record
-                    admin = Admin.objects.get(user__email=admin_email)
-                    Notification.objects.create(
-                        notification_type='email',
-                        recipient=admin.user,
-                        order=order,
-                        subject=subject,
-                        message=message,
-                        status='sent',
-                        sent_at=timezone.now()
-                    )
-                else:
-                    logger.error(f"Failed to send admin notification to {admin_email}")
-                
-                results.append({
-                    'email': admin_email,
-                    'success': bool(result)
-                })
-                
+                error = None
             except Exception as e:
-                logger.error(f"Error sending admin notification to {admin_email}: {e}")
-                results.append({
-                    'email': admin_email,
-                    'success': False,
-                    'error': str(e)
-                })
+                logger.error(f"Error sending admin notification to {len(batch)} admins: {e}")
+                result, error = 0, str(e)
+            
+            if result:
+                logger.info(f"Admin notification sent to {len(batch)} admins")
+            elif error is None:
+                logger.error(f"Failed to send admin notification to {len(batch)} admins")
+            
+            notifications.extend(
+                Notification(
+                    notification_type='email',
+                    recipient=admin.user,
+                    order=order,
+                    subject=subject,
+                    message=message,
+                    status='sent' if result else 'failed',
+                    error_message='' if result else error or 'Email sending failed',
+                    sent_at=sent_at if result else None
+                )
+                for admin in batch
+            )
+            
+            for admin_email in admin_emails:
+                entry = {'email': admin_email, 'success': bool(result)}
+                if error:
+                    entry['error'] = error
+                results.append(entry)
+        
+        Notification.objects.bulk_create(notifications)
+        success_count = sum(notification.status == 'sent' for notification in notifications)
         
         return {
-            'success': success_count > 0,
-            'total_admins': len(admin_emails),
+            'success': bool(success_count),
+            'total_admins': len(admins),
             'success_count': success_count,
             'results': results
         }
@@ -0,0 +1,120 @@
+from django.db import transaction
+from django.utils import timezone
+from .models import Campaign, Notification, OutboxMessage
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Customers walked per run_campaign task
+CAMPAIGN_CHUNK_SIZE = 1000
+
+
+def start_campaign(created_by, message, subject='', send_sms=True, send_email=True, customer_ids=None):
+    """
+    Create a campaign and queue its first chunk
+
+    Args:
+        created_by: Admin customer starting the campaign
+        message (str): Message content
+        subject (str): Email subject
+        send_sms (bool): Whether to send SMS
+        send_email (bool): Whether to send email
+        customer_ids (list): Recipients; all customers when empty
+
+    Returns:
+        Campaign: The queued campaign
+    """
+    with transaction.atomic():
+        campaign = Campaign.objects.create(
+            created_by=created_by,
+            message=message,
+            subject=subject,
+            send_sms=send_sms,
+            send_email=send_email,
+            customer_ids=list(customer_ids or [])
+        )
+        OutboxMessage.objects.enqueue('notifications.tasks.run_campaign', str(campaign.id))
+
+    logger.info(f"Campaign {campaign.id} queued")
+    return campaign
+
+
+def process_campaign_chunk(campaign_id, chunk_size=CAMPAIGN_CHUNK_SIZE):
+    """
+    Create notifications for the next chunk of a campaign's recipients
+
+    Recipients are walked by customer ID from the stored keyset position.
+    The chunk's notifications are handed to the batched SMS and email tasks,
+    and the next chunk is queued in the same transaction, so a crash
+    resumes where the campaign left off.
+
+    Args:
+        campaign_id: Campaign primary key
+        chunk_size (int): Customers per chunk
+
+    Returns:
+        Campaign: The campaign after this chunk
+    """
+    with transaction.atomic():
+        campaign = Campaign.objects.select_for_update().get(pk=campaign_id)
+        if campaign.status not in ['queued', 'running']:
+            return campaign
+
+        if campaign.status == 'queued':
+            campaign.status = 'running'
+            campaign.started_at = timezone.now()
+            campaign.total_recipients = campaign.recipients().count()
+
+        customers = list(
+            campaign.recipients()
+            .filter(id__gt=campaign.last_customer_id)
+            .order_by('id')
+            .only('id', 'phone_number')[:chunk_size]
+        )
+
+        if not customers:
+            # Every recipient is queued; completion waits for the send counters
+            campaign.status = 'sending'
+            campaign.save(update_fields=['status', 'started_at', 'total_recipients', 'updated_at'])
+            Campaign.objects.complete_if_done(campaign.pk)
+            logger.info(f"Campaign {campaign.id} queued all {campaign.processed_recipients} recipients")
+            return campaign
+
+        def notification(customer, notification_type):
+            return Notification(
+                notification_type=notification_type,
+                recipient=customer,
+                campaign=campaign,
+                subject=campaign.subject,
+                message=campaign.message,
+                status='pending'
+            )
+
+        sms = [notification(c, 'sms') for c in customers if campaign.send_sms and c.phone_number]
+        emails = [notification(c, 'email') for c in customers if campaign.send_email]
+        Notification.objects.bulk_create(sms + emails)
+
+        campaign.last_customer_id = customers[-1].id
+        campaign.processed_recipients += len(customers)
+        campaign.sms_queued += len(sms)
+        campaign.email_queued += len(emails)
+        campaign.save(update_fields=[
+            'status', 'started_at', 'total_recipients', 'last_customer_id',
+            'processed_recipients', 'sms_queued', 'email_queued', 'updated_at'
+        ])
+
+        if sms:
+            OutboxMessage.objects.enqueue(
+                'notifications.tasks.send_bulk_sms_notifications',
+                [str(n.id) for n in sms],
+                campaign_id=str(campaign.id)
+            )
+        if emails:
+            OutboxMessage.objects.enqueue(
+                'notifications.tasks.send_bulk_email_notifications',
+                [str(n.id) for n in emails],
+                campaign_id=str(campaign.id)
+            )
+        OutboxMessage.objects.enqueue('notifications.tasks.run_campaign', str(campaign.id))
+
+    return campaign
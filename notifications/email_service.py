@@ -1,8 +1,8 @@
-from django.core.mail import send_mail
 from django.conf import settings
 from django.utils import timezone
 from django.template.loader import render_to_string
 from .models import Notification, EmailNotification
+from .mail import send_pooled_email
 import logging
 
 logger = logging.getLogger(__name__)
@@ -29,13 +29,12 @@ class EmailService:
             dict: Response with status and details
         """
         try:
-            # Send email
-            result = send_mail(
+            # Tasks send over the worker's pooled SMTP session, web requests per message
+            result = send_pooled_email(
                 subject=subject,
                 message=message,
+                recipients=[to_email],
                 from_email=self.from_email,
-                recipient_list=[to_email],
-                fail_silently=self.fail_silently,
                 html_message=html_message
             )
             
@@ -97,6 +96,60 @@ class EmailService:
         except Exception as e:
             logger.error(f"Failed to update notification {notification_id}: {e}")
     
+    def send_notifications(self, notifications):
+        """
+        Send pending email notifications over the pooled SMTP connection
+        
+        Each result is written back to its Notification and
+        EmailNotification rows in bulk.
+        
+        Args:
+            notifications (list): Email Notifications with recipients loaded
+            
+        Returns:
+            dict: Number of notifications sent and failed
+        """
+        results = {}
+        for notification in notifications:
+            try:
+                sent = send_pooled_email(
+                    subject=notification.subject or "Notification from OrderFlow",
+                    message=notification.message,
+                    recipients=[notification.recipient.email],
+                    from_email=self.from_email
+                )
+                results[notification.pk] = '' if sent else 'Email sending failed'
+            except Exception as e:
+                logger.error(f"Email to {notification.recipient.email} failed: {e}")
+                results[notification.pk] = str(e)
+        
+        now = timezone.now()
+        for notification in notifications:
+            notification.status = 'failed' if results[notification.pk] else 'sent'
+            notification.error_message = results[notification.pk]
+            notification.sent_at = now
+            notification.updated_at = now
+        
+        Notification.objects.bulk_update(
+            notifications, ['status', 'sent_at', 'error_message', 'updated_at']
+        )
+        EmailNotification.objects.bulk_create(
+            [
+                EmailNotification(
+                    notification=notification,
+                    email_address=notification.recipient.email,
+                    template_used='custom'
+                )
+                for notification in notifications
+            ],
+            update_conflicts=True,
+            unique_fields=['notification'],
+            update_fields=['email_address']
+        )
+        
+        sent = sum(1 for error in results.values() if not error)
+        return {'sent': sent, 'failed': len(notifications) - sent}
+    
     def send_order_confirmation(self, order):
         """Send order confirmation email"""
         customer = order.customer
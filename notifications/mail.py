@@ -0,0 +1,154 @@
+import os
+import smtplib
+import threading
+import time
+from celery import current_task
+from celery.signals import worker_process_shutdown
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Errors after which the SMTP session is reopened and the message retried once
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+# "Service not available, closing transmission channel"
+SMTP_SERVICE_UNAVAILABLE = 421
+
+
+class PooledEmailConnection:
+    """
+    Long-lived, authenticated email backend connection
+
+    The TLS handshake and login happen once per session instead of once per
+    message. A session idle for longer than EMAIL_POOL_IDLE_CHECK seconds is
+    probed with NOOP before reuse, and sessions are recycled after
+    EMAIL_POOL_MAX_MESSAGES messages because providers cap them.
+    """
+
+    def __init__(self):
+        self.connection = None
+        self.sent_count = 0
+        self.last_used = 0.0
+
+    def open(self):
+        """Open a new backend session"""
+        self.close()
+        self.connection = get_connection(fail_silently=False)
+        self.connection.open()
+        self.sent_count = 0
+        self.last_used = time.monotonic()
+
+    def close(self):
+        """Close the current session, ignoring errors from a dead socket"""
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except Exception:
+                pass
+        self.connection = None
+
+    def is_alive(self):
+        """Probe an SMTP session with NOOP; non-SMTP backends are always alive"""
+        if not hasattr(self.connection, 'connection'):
+            return True
+        smtp = self.connection.connection
+        if smtp is None:
+            return False
+        try:
+            return smtp.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def ensure_open(self):
+        """Reuse the current session when it is healthy, otherwise open a new one"""
+        if self.connection is None or self.sent_count >= settings.EMAIL_POOL_MAX_MESSAGES:
+            self.open()
+        elif time.monotonic() - self.last_used > settings.EMAIL_POOL_IDLE_CHECK and not self.is_alive():
+            logger.info("Pooled email connection went stale, reconnecting")
+            self.open()
+
+    def send(self, message):
+        """
+        Send one EmailMessage, reconnecting once if the session dropped
+
+        Returns:
+            bool: True if the backend accepted the message
+        """
+        for attempt in (1, 2):
+            self.ensure_open()
+            try:
+                sent = self.connection.send_messages([message])
+            except smtplib.SMTPResponseException as e:
+                if e.smtp_code != SMTP_SERVICE_UNAVAILABLE or attempt == 2:
+                    raise
+                logger.warning(f"SMTP server closed the session ({e.smtp_code}), reconnecting")
+                self.close()
+                continue
+            except RECONNECT_ERRORS as e:
+                if attempt == 2:
+                    raise
+                logger.warning(f"Pooled email connection dropped ({e}), reconnecting")
+                self.close()
+                continue
+
+            self.sent_count += 1
+            self.last_used = time.monotonic()
+            return bool(sent)
+
+
+_local = threading.local()
+
+
+def get_email_pool():
+    """
+    Return the pooled connection of the current worker process and thread
+
+    A connection inherited through fork() is dropped without being closed,
+    since its socket belongs to the parent process.
+    """
+    pool = getattr(_local, 'pool', None)
+    if pool is None or getattr(_local, 'pid', None) != os.getpid():
+        pool = _local.pool = PooledEmailConnection()
+        _local.pid = os.getpid()
+    return pool
+
+
+def build_email(subject, message, recipients, from_email=None, html_message=None, bcc=None):
+    """Build an email message the way send_mail() would"""
+    email = EmailMultiAlternatives(
+        subject=subject,
+        body=message,
+        from_email=from_email,
+        to=list(recipients),
+        bcc=list(bcc or [])
+    )
+    if html_message:
+        email.attach_alternative(html_message, 'text/html')
+    return email
+
+
+def send_pooled_email(subject, message, recipients, from_email=None, html_message=None, bcc=None):
+    """
+    Drop-in replacement for send_mail() that reuses the pooled connection
+
+    Only Celery tasks use the pool, since worker processes close it on
+    shutdown. Outside a task, such as in a web request thread, the message
+    goes over a connection of its own like send_mail() would, so no SMTP
+    session is left open in the thread.
+
+    Returns:
+        int: 1 if the message was sent, 0 otherwise
+    """
+    email = build_email(subject, message, recipients, from_email, html_message, bcc)
+    if not current_task:
+        return email.send(fail_silently=False)
+    return int(get_email_pool().send(email))
+
+
+@worker_process_shutdown.connect
+def close_email_pool(**kwargs):
+    """Say QUIT to the SMTP server when a Celery worker process exits"""
+    pool = getattr(_local, 'pool', None)
+    if pool is not None:
+        pool.close()
@@ -0,0 +1,52 @@
+import time
+from django.core.mail import send_mail
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from notifications.mail import build_email, get_email_pool
+
+
+class Command(BaseCommand):
+    help = 'Compare per-message and pooled SMTP sending against a local sink (see smtp_sink)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1', help='SMTP host (default: 127.0.0.1)')
+        parser.add_argument('--port', type=int, default=1025, help='SMTP port (default: 1025)')
+        parser.add_argument('--count', type=int, default=200, help='Messages per run (default: 200)')
+
+    def handle(self, *args, **options):
+        count = options['count']
+        smtp_settings = override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST=options['host'],
+            EMAIL_PORT=options['port'],
+            EMAIL_USE_TLS=False,
+            EMAIL_USE_SSL=False,
+            EMAIL_HOST_USER='',
+            EMAIL_HOST_PASSWORD=''
+        )
+
+        runs = [
+            ('send_mail (connection per message)', lambda i: send_mail(
+                f'Benchmark {i}', 'Benchmark message', 'bench@orderflow.local', ['sink@orderflow.local']
+            )),
+            ('pooled connection', lambda i: get_email_pool().send(build_email(
+                f'Benchmark {i}', 'Benchmark message', ['sink@orderflow.local'], 'bench@orderflow.local'
+            ))),
+        ]
+
+        try:
+            with smtp_settings:
+                for label, send in runs:
+                    started = time.perf_counter()
+                    for i in range(count):
+                        send(i)
+                    elapsed = time.perf_counter() - started
+                    self.stdout.write(
+                        f'{label}: {count} messages in {elapsed:.2f}s ({count / elapsed:.1f} msg/s)'
+                    )
+                get_email_pool().close()
+
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'Benchmark failed (is smtp_sink running?): {e}')
+            )
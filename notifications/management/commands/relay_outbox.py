@@ -0,0 +1,55 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from notifications.outbox import OUTBOX_BATCH_SIZE, relay_outbox
+
+
+class Command(BaseCommand):
+    help = 'Publish queued notification tasks from the transactional outbox to the broker'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=OUTBOX_BATCH_SIZE,
+            help=f'Messages published per batch (default: {OUTBOX_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Seconds to wait when the outbox is empty (default: 1.0)'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the outbox once and exit instead of polling'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Starting outbox relay (batch size {batch_size})')
+        )
+
+        try:
+            while True:
+                close_old_connections()
+                try:
+                    # Keep draining while batches come back full
+                    while relay_outbox(batch_size) == batch_size:
+                        pass
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f'Outbox relay error: {e}'))
+                    if options['once']:
+                        raise
+
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+
+        except KeyboardInterrupt:
+            self.stdout.write(
+                self.style.WARNING('Outbox relay stopped by user')
+            )
@@ -0,0 +1,107 @@
+import asyncio
+import time
+from django.core.management.base import BaseCommand
+
+
+class SMTPSink:
+    """Minimal SMTP server that accepts and discards every message"""
+
+    def __init__(self, handshake_delay=0.0):
+        self.handshake_delay = handshake_delay
+        self.connections = 0
+        self.messages = 0
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        # Stands in for the TLS handshake and login of a real provider
+        if self.handshake_delay:
+            await asyncio.sleep(self.handshake_delay)
+
+        async def reply(line):
+            writer.write(f'{line}\r\n'.encode())
+            await writer.drain()
+
+        await reply('220 orderflow-sink ESMTP')
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode(errors='replace').strip().upper()
+
+                if command.startswith('EHLO'):
+                    await reply('250-orderflow-sink')
+                    await reply('250-AUTH PLAIN LOGIN')
+                    await reply('250 8BITMIME')
+                elif command.startswith('HELO'):
+                    await reply('250 orderflow-sink')
+                elif command.startswith('AUTH'):
+                    await reply('235 Authentication successful')
+                elif command == 'DATA':
+                    await reply('354 End data with <CR><LF>.<CR><LF>')
+                    while (await reader.readline()) not in (b'.\r\n', b'.\n', b''):
+                        pass
+                    self.messages += 1
+                    await reply('250 Queued')
+                elif command == 'QUIT':
+                    await reply('221 Bye')
+                    break
+                else:
+                    # MAIL, RCPT, RSET and NOOP
+                    await reply('250 OK')
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+class Command(BaseCommand):
+    help = 'Run a local SMTP sink that discards mail, for benchmarking email throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+        parser.add_argument('--port', type=int, default=1025, help='Port to listen on (default: 1025)')
+        parser.add_argument(
+            '--handshake-delay',
+            type=float,
+            default=0.0,
+            help='Seconds to stall every new connection, simulating TLS and login (default: 0)'
+        )
+        parser.add_argument(
+            '--report-interval',
+            type=float,
+            default=5.0,
+            help='Seconds between throughput reports (default: 5)'
+        )
+
+    def handle(self, *args, **options):
+        sink = SMTPSink(options['handshake_delay'])
+
+        async def report():
+            last_messages, last_time = 0, time.monotonic()
+            while True:
+                await asyncio.sleep(options['report_interval'])
+                now = time.monotonic()
+                rate = (sink.messages - last_messages) / (now - last_time)
+                self.stdout.write(
+                    f'{sink.messages} messages over {sink.connections} connections ({rate:.1f} msg/s)'
+                )
+                last_messages, last_time = sink.messages, now
+
+        async def serve():
+            server = await asyncio.start_server(sink.handle, options['host'], options['port'])
+            self.stdout.write(
+                self.style.SUCCESS(f"SMTP sink listening on {options['host']}:{options['port']}")
+            )
+            asyncio.create_task(report())
+            async with server:
+                await server.serve_forever()
+
+        try:
+            asyncio.run(serve())
+        except KeyboardInterrupt:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'SMTP sink stopped after {sink.messages} messages over {sink.connections} connections'
+                )
+            )
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-17 04:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_campaigns'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['campaign', 'notification_type', 'status'], name='notif_campaign_status_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from orders.models import Order
 import uuid
 
@@ -24,6 +25,7 @@ class Notification(models.Model):
     notification_type = models.CharField(max_length=10, choices=NOTIFICATION_TYPES)
     recipient = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='notifications')
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='notifications', null=True, blank=True)
+    campaign = models.ForeignKey('Campaign', on_delete=models.SET_NULL, related_name='notifications', null=True, blank=True)
     subject = models.CharField(max_length=255, blank=True)
     message = models.TextField()
     status = models.CharField(max_length=10, choices=NOTIFICATION_STATUS, default='pending')
@@ -40,6 +42,13 @@ class Notification(models.Model):
         verbose_name = 'Notification'
         verbose_name_plural = 'Notifications'
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination on (created_at, id), globally and per recipient
+            models.Index(fields=['created_at', 'id'], name='notifications_created_id_idx'),
+            models.Index(fields=['recipient', 'created_at', 'id'], name='notif_recipient_created_idx'),
+            # Campaign progress is recounted per channel and status
+            models.Index(fields=['campaign', 'notification_type', 'status'], name='notif_campaign_status_idx'),
+        ]
     
     def __str__(self):
         return f"{self.notification_type.upper()} to {self.recipient.email} - {self.status}"
@@ -81,3 +90,166 @@ class EmailNotification(models.Model):
     
     def __str__(self):
         return f"Email to {self.email_address} - {self.notification.status}"
+
+
+class CampaignManager(models.Manager):
+    """Manager for atomic campaign progress updates"""
+    
+    def refresh_counts(self, campaign_id, channel):
+        """
+        Recount a channel's sent and failed notifications from the campaign's rows
+        
+        Counting rows rather than adding up batch totals keeps the counters
+        exact when a send task is redelivered or rerun.
+        
+        Args:
+            campaign_id: Campaign primary key
+            channel (str): 'sms' or 'email'
+        """
+        counts = dict(
+            Notification.objects.filter(campaign_id=campaign_id, notification_type=channel)
+            .order_by().values_list('status').annotate(count=models.Count('pk'))
+        )
+        self.filter(pk=campaign_id).update(**{
+            f'{channel}_sent': counts.get('sent', 0) + counts.get('delivered', 0),
+            f'{channel}_failed': counts.get('failed', 0),
+        })
+        self.complete_if_done(campaign_id)
+    
+    def complete_if_done(self, campaign_id):
+        """Mark the campaign completed once every queued notification has a result"""
+        return self.filter(
+            pk=campaign_id,
+            status='sending',
+            sms_queued=models.F('sms_sent') + models.F('sms_failed'),
+            email_queued=models.F('email_sent') + models.F('email_failed')
+        ).update(status='completed', completed_at=timezone.now())
+
+
+class Campaign(models.Model):
+    """
+    Custom notification sent to many customers in the background
+    Recipients are walked in chunks by customer ID; the counters record progress
+    """
+    CAMPAIGN_STATUS = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('sending', 'Sending'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_by = models.ForeignKey(Customer, on_delete=models.SET_NULL, related_name='campaigns', null=True, blank=True)
+    subject = models.CharField(max_length=255, blank=True)
+    message = models.TextField()
+    send_sms = models.BooleanField(default=True)
+    send_email = models.BooleanField(default=True)
+    # Empty means every customer
+    customer_ids = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=10, choices=CAMPAIGN_STATUS, default='queued')
+    total_recipients = models.PositiveIntegerField(default=0)
+    processed_recipients = models.PositiveIntegerField(default=0)
+    # Keyset position of the recipient walk
+    last_customer_id = models.PositiveIntegerField(default=0)
+    sms_queued = models.PositiveIntegerField(default=0)
+    sms_sent = models.PositiveIntegerField(default=0)
+    sms_failed = models.PositiveIntegerField(default=0)
+    email_queued = models.PositiveIntegerField(default=0)
+    email_sent = models.PositiveIntegerField(default=0)
+    email_failed = models.PositiveIntegerField(default=0)
+    error_message = models.TextField(blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    objects = CampaignManager()
+    
+    class Meta:
+        db_table = 'notification_campaigns'
+        verbose_name = 'Campaign'
+        verbose_name_plural = 'Campaigns'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='campaigns_created_id_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Campaign {self.id} - {self.status}"
+    
+    def recipients(self):
+        """Customers this campaign is sent to"""
+        customers = Customer.objects.all()
+        if self.customer_ids:
+            customers = customers.filter(id__in=self.customer_ids)
+        return customers
+    
+    @property
+    def progress(self):
+        """Percentage of recipients walked so far"""
+        if not self.total_recipients:
+            return 100 if self.status in ['sending', 'completed'] else 0
+        return round(100 * self.processed_recipients / self.total_recipients, 1)
+
+
+class OutboxMessageManager(models.Manager):
+    """Manager for queueing tasks through the transactional outbox"""
+    
+    def enqueue(self, task, *args, **kwargs):
+        """
+        Record a task to be published once the current transaction commits
+        
+        Call this inside the transaction that makes the change the task
+        depends on: the row commits or rolls back together with it, and the
+        outbox relay publishes it to the broker afterwards.
+        
+        Args:
+            task: Celery task or registered task name
+            *args, **kwargs: JSON-serializable task arguments
+            
+        Returns:
+            OutboxMessage: The stored message
+        """
+        return self.create(
+            task_name=getattr(task, 'name', task),
+            args=list(args),
+            kwargs=kwargs
+        )
+    
+    def pending(self):
+        """Messages not yet published, oldest first"""
+        return self.filter(published_at__isnull=True).order_by('id')
+
+
+class OutboxMessage(models.Model):
+    """
+    Celery task waiting to be published by the outbox relay
+    Written in the same transaction as the order change that triggers it
+    """
+    task_name = models.CharField(max_length=255)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    published_at = models.DateTimeField(null=True, blank=True)
+    
+    objects = OutboxMessageManager()
+    
+    class Meta:
+        db_table = 'notification_outbox'
+        verbose_name = 'Outbox Message'
+        verbose_name_plural = 'Outbox Messages'
+        indexes = [
+            # The relay only ever scans unpublished rows
+            models.Index(
+                fields=['id'],
+                name='outbox_pending_idx',
+                condition=models.Q(published_at__isnull=True)
+            ),
+        ]
+    
+    def __str__(self):
+        state = 'published' if self.published_at else 'pending'
+        return f"{self.task_name} #{self.pk} - {state}"
@@ -0,0 +1,77 @@
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from orderflow.celery import app
+from .models import OutboxMessage
+import logging
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = 100
+# Messages that keep failing to publish are left in the table for inspection
+OUTBOX_MAX_ATTEMPTS = 10
+OUTBOX_RETENTION = timedelta(days=7)
+
+
+def relay_outbox(batch_size=OUTBOX_BATCH_SIZE):
+    """
+    Publish one batch of pending outbox messages to the broker
+
+    Rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so several
+    relays can run side by side, and all messages of a batch go out over a
+    single broker connection. A message is marked published only after the
+    broker accepted it; a crash in between publishes it again, so delivery
+    is at least once.
+
+    Args:
+        batch_size (int): Maximum number of messages to publish
+
+    Returns:
+        int: Number of messages published
+    """
+    with transaction.atomic():
+        messages = list(
+            OutboxMessage.objects.pending()
+            .filter(attempts__lt=OUTBOX_MAX_ATTEMPTS)
+            .select_for_update(skip_locked=True)[:batch_size]
+        )
+        if not messages:
+            return 0
+
+        published = []
+        with app.producer_or_acquire() as producer:
+            for message in messages:
+                try:
+                    app.signature(
+                        message.task_name, args=message.args, kwargs=message.kwargs
+                    ).apply_async(producer=producer, task_id=f"outbox-{message.pk}")
+                except Exception as e:
+                    # The broker is most likely unavailable; retry the rest on the next run
+                    logger.error(f"Failed to publish outbox message {message.pk} ({message.task_name}): {e}")
+                    OutboxMessage.objects.filter(pk=message.pk).update(
+                        attempts=F('attempts') + 1, last_error=str(e)
+                    )
+                    break
+                published.append(message.pk)
+
+        if published:
+            OutboxMessage.objects.filter(pk__in=published).update(
+                published_at=timezone.now(), attempts=F('attempts') + 1, last_error=''
+            )
+
+    logger.info(f"Published {len(published)} outbox messages")
+    return len(published)
+
+
+def purge_published_outbox(older_than=OUTBOX_RETENTION):
+    """
+    Delete messages published more than older_than ago
+
+    Returns:
+        int: Number of messages deleted
+    """
+    deleted, _ = OutboxMessage.objects.filter(
+        published_at__lt=timezone.now() - older_than
+    ).delete()
+    return deleted
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import Notification, SMSNotification, EmailNotification
+from orderflow.fieldsets import SparseFieldsetMixin
+from .models import Campaign, Notification, SMSNotification, EmailNotification
 
 
 class SMSNotificationSerializer(serializers.ModelSerializer):
@@ -18,7 +19,7 @@ class EmailNotificationSerializer(serializers.ModelSerializer):
         fields = ['email_address', 'message_id', 'template_used']
 
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for notification model"""
     sms_details = SMSNotificationSerializer(read_only=True)
     email_details = EmailNotificationSerializer(read_only=True)
@@ -57,7 +58,25 @@ class SendNotificationSerializer(serializers.Serializer):
     send_sms = serializers.BooleanField(default=True)
     send_email = serializers.BooleanField(default=True)
     customer_ids = serializers.ListField(
-        child=serializers.UUIDField(),
+        child=serializers.IntegerField(),
         required=False
     )
 
+
+class CampaignSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Serializer for campaign progress"""
+    created_by_email = serializers.CharField(source='created_by.email', read_only=True)
+    progress = serializers.ReadOnlyField()
+    
+    class Meta:
+        model = Campaign
+        fields = [
+            'id', 'created_by', 'created_by_email', 'subject', 'message',
+            'send_sms', 'send_email', 'customer_ids', 'status', 'progress',
+            'total_recipients', 'processed_recipients',
+            'sms_queued', 'sms_sent', 'sms_failed',
+            'email_queued', 'email_sent', 'email_failed',
+            'error_message', 'started_at', 'completed_at', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
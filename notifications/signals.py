@@ -1,6 +1,8 @@
+from django.db import transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from orders.models import Order
+from .models import OutboxMessage
 from .tasks import send_order_status_update, send_delivery_notification
 import logging
 
@@ -11,6 +13,9 @@ def handle_order_status_change(sender, instance, created, **kwargs):
     """
     Handle order status changes (not creation)
     Order creation notifications are handled in the serializer
+    
+    Tasks go through the outbox, so they are only published if the status
+    change commits and never delay the request with broker I/O.
     """
     if not created and hasattr(instance, 'tracker') and instance.tracker.has_changed('status'):
         old_status = instance.tracker.previous('status')
@@ -18,9 +23,10 @@ def handle_order_status_change(sender, instance, created, **kwargs):
         
         logger.info(f"Queueing status update for order {instance.order_number}: {old_status} → {new_status}")
         
-        try:
+        with transaction.atomic():
             # Queue status update notifications
-            status_task = send_order_status_update.delay(
+            OutboxMessage.objects.enqueue(
+                send_order_status_update,
                 str(instance.id), 
                 old_status, 
                 new_status, 
@@ -28,14 +34,7 @@ def handle_order_status_change(sender, instance, created, **kwargs):
                 send_email=True
             )
             
-            logger.info(f"Status update task queued for order {instance.order_number} - Task ID: {status_task.id}")
-            
             # Queue delivery notification if status is 'delivered'
             if new_status == 'delivered':
                 logger.info(f"Queueing delivery notification for order {instance.order_number}")
-                delivery_task = send_delivery_notification.delay(str(instance.id))
-                logger.info(f"Delivery notification task queued - Task ID: {delivery_task.id}")
-                
-        except Exception as e:
-            logger.error(f"Error queueing status update for order {instance.order_number}: {e}")
-
+                OutboxMessage.objects.enqueue(send_delivery_notification, str(instance.id))
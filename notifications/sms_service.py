@@ -1,4 +1,7 @@
 import africastalking
+import re
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
 from django.conf import settings
 from django.utils import timezone
 from .models import Notification, SMSNotification
@@ -6,6 +9,24 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Recipients per Africa's Talking send request
+SMS_MAX_RECIPIENTS = 1000
+
+
+def parse_cost(cost):
+    """Turn a provider cost such as 'KES 0.8000' into a Decimal, or None"""
+    try:
+        return Decimal(str(cost).split()[-1])
+    except (InvalidOperation, IndexError):
+        return None
+
+
+def normalize_phone_number(phone_number):
+    """Reduce a phone number to the E.164 form the provider reports, e.g. '+254 700-000 000' -> '+254700000000'"""
+    digits = re.sub(r'\D', '', phone_number or '')
+    return f"+{digits}" if digits else ''
+
+
 class SMSService:
     """SMS service using Africa's Talking"""
     
@@ -114,6 +135,136 @@ class SMSService:
                 'error': str(e)
             }
     
+    def _send(self, message, phone_numbers):
+        """Make one provider request, using the sender ID when one is configured"""
+        if self.sender_id and self.sender_id != 'ORDERFLOW':
+            return self.sms.send(message, phone_numbers, sender_id=self.sender_id)
+        return self.sms.send(message, phone_numbers)
+    
+    def send_bulk_sms(self, message, phone_numbers):
+        """
+        Send one message to many recipients in a single provider request
+        
+        Args:
+            message (str): SMS message content
+            phone_numbers (list): Recipient phone numbers, at most SMS_MAX_RECIPIENTS
+            
+        Returns:
+            dict: Result dict per normalized phone number (see normalize_phone_number),
+                shaped like send_sms() results
+        """
+        # The provider reports E.164 numbers; send and key results the same way
+        normalized = (normalize_phone_number(number) for number in phone_numbers)
+        phone_numbers = list(dict.fromkeys(number for number in normalized if number))
+        if not self.sms:
+            logger.error("SMS service not initialized")
+            return {number: {'success': False, 'error': 'SMS service not initialized'} for number in phone_numbers}
+        
+        try:
+            logger.info(f"Sending SMS to {len(phone_numbers)} recipients - Message: {message[:50]}...")
+            response = self._send(message, phone_numbers)
+            sms_data = response['SMSMessageData']
+        except Exception as e:
+            logger.error(f"Bulk SMS sending failed: {e}")
+            return {number: {'success': False, 'error': str(e)} for number in phone_numbers}
+        
+        results = {}
+        for recipient in sms_data.get('Recipients', []):
+            number = normalize_phone_number(recipient.get('number'))
+            status = recipient.get('status', 'Unknown')
+            if status == 'Success':
+                results[number] = {
+                    'success': True,
+                    'message_id': recipient.get('messageId', ''),
+                    'cost': recipient.get('cost', '0'),
+                    'status': 'sent'
+                }
+            else:
+                results[number] = {
+                    'success': False,
+                    'error': f"{status}: {recipient.get('statusCode', '')}"
+                }
+        
+        # Numbers the provider did not report on (e.g. a rejected request)
+        error = sms_data.get('Message') or 'No result for recipient'
+        for number in phone_numbers:
+            results.setdefault(number, {'success': False, 'error': error})
+        
+        sent = sum(1 for result in results.values() if result['success'])
+        logger.info(f"Bulk SMS sent to {sent} of {len(phone_numbers)} recipients")
+        return results
+    
+    def send_notifications(self, notifications, batch_size=SMS_MAX_RECIPIENTS):
+        """
+        Send pending SMS notifications with as few provider requests as possible
+        
+        Notifications with the same message body share one request per
+        batch_size recipients. Each recipient's result is written back to
+        its Notification and SMSNotification rows in bulk.
+        
+        Args:
+            notifications (iterable): SMS Notifications with recipients loaded
+            batch_size (int): Recipients per provider request
+            
+        Returns:
+            dict: Number of notifications sent and failed
+        """
+        by_message = defaultdict(list)
+        for notification in notifications:
+            by_message[notification.message].append(notification)
+        
+        totals = {'sent': 0, 'failed': 0}
+        for message, group in by_message.items():
+            for start in range(0, len(group), batch_size):
+                batch = group[start:start + batch_size]
+                # send_bulk_sms drops duplicates, so a number is charged once
+                phone_numbers = [notification.recipient.phone_number for notification in batch]
+                results = self.send_bulk_sms(message, phone_numbers) if any(phone_numbers) else {}
+                
+                sent = self._record_results(batch, results)
+                totals['sent'] += sent
+                totals['failed'] += len(batch) - sent
+        
+        return totals
+    
+    def _record_results(self, notifications, results):
+        """Write per-recipient results onto notification rows in bulk; returns the number sent"""
+        now = timezone.now()
+        details = []
+        charged = set()
+        sent = 0
+        for notification in notifications:
+            number = normalize_phone_number(notification.recipient.phone_number)
+            result = results.get(number) or {
+                'success': False, 'error': 'Recipient has no phone number'
+            }
+            
+            notification.status = 'sent' if result['success'] else 'failed'
+            notification.sent_at = now
+            notification.error_message = result.get('error', '')
+            notification.updated_at = now
+            sent += result['success']
+            
+            details.append(SMSNotification(
+                notification=notification,
+                phone_number=number,
+                message_id=result.get('message_id', ''),
+                # Notifications sharing a number share one message and one charge
+                cost=None if number in charged else parse_cost(result.get('cost'))
+            ))
+            charged.add(number)
+        
+        Notification.objects.bulk_update(
+            notifications, ['status', 'sent_at', 'error_message', 'updated_at']
+        )
+        SMSNotification.objects.bulk_create(
+            details,
+            update_conflicts=True,
+            unique_fields=['notification'],
+            update_fields=['phone_number', 'message_id', 'cost']
+        )
+        return sent
+    
     def _update_notification(self, notification_id, message_id, cost, status, error_message=''):
         """Update notification record with SMS details"""
         try:
@@ -3,12 +3,22 @@ from django.utils import timezone
 from datetime import timedelta
 import logging
 
-from .models import Notification, SMSNotification, EmailNotification
-from .sms_service import SMSService
+from .models import Campaign, Notification, SMSNotification, EmailNotification
+from .sms_service import SMSService, SMS_MAX_RECIPIENTS
 from .email_service import EmailService
+from .campaigns import process_campaign_chunk
 
 logger = logging.getLogger(__name__)
 
+# Email notifications loaded per batch by send_bulk_email_notifications
+EMAIL_BATCH_SIZE = 200
+
+def _fail_pending(notifications, error):
+    """Mark the notifications a crashed batch left pending as failed; returns how many"""
+    return Notification.objects.filter(
+        pk__in=[notification.pk for notification in notifications], status='pending'
+    ).update(status='failed', error_message=error, updated_at=timezone.now())
+
 @shared_task(bind=True, max_retries=3, default_retry_delay=60)
 def send_sms_notification(self, notification_id):
     """
@@ -37,6 +47,10 @@ def send_sms_notification(self, notification_id):
             str(notification.id)
         )
         
+        # Campaign counters are recounted from the rows, e.g. after a retry
+        if notification.campaign_id:
+            Campaign.objects.refresh_counts(notification.campaign_id, notification.notification_type)
+        
         if result.get('success'):
             logger.info(f"SMS notification {notification_id} sent successfully")
             return result
@@ -81,6 +95,10 @@ def send_email_notification(self, notification_id):
             str(notification.id)
         )
         
+        # Campaign counters are recounted from the rows, e.g. after a retry
+        if notification.campaign_id:
+            Campaign.objects.refresh_counts(notification.campaign_id, notification.notification_type)
+        
         if result.get('success'):
             logger.info(f"Email notification {notification_id} sent successfully")
             return result
@@ -206,6 +224,9 @@ def send_order_status_update(order_id, old_status, new_status, send_sms=True, se
 def retry_failed_notifications():
     """
     Retry failed notifications that haven't exceeded max retries
+    
+    Retried campaign notifications refresh their campaign's counters once
+    they have been resent.
     """
     try:
         # Get failed notifications that can be retried
@@ -255,48 +276,133 @@ def cleanup_failed_notifications():
         return {'error': str(e)}
 
 @shared_task
-def send_bulk_sms_notifications(notification_ids):
+def cleanup_published_outbox():
+    """
+    Delete outbox messages that were published more than a week ago
+    """
+    try:
+        from .outbox import purge_published_outbox
+        
+        count = purge_published_outbox()
+        
+        logger.info(f"Cleaned up {count} published outbox messages")
+        return {'cleaned_count': count}
+        
+    except Exception as e:
+        logger.error(f"Error cleaning up outbox messages: {e}")
+        return {'error': str(e)}
+
+@shared_task
+def send_bulk_sms_notifications(notification_ids, campaign_id=None):
     """
     Send multiple SMS notifications in bulk
     
+    Notifications are loaded SMS_MAX_RECIPIENTS at a time, and those with
+    the same message go out in a single multi-recipient provider request.
+    Notifications that were already sent are skipped, and a batch that
+    raises is marked failed so its campaign can still complete.
+    
     Args:
         notification_ids (list): List of notification UUIDs
+        campaign_id (str): Campaign whose progress counters to update
         
     Returns:
-        dict: Results for all notifications
+        dict: Sent and failed counts
     """
-    results = []
+    sms_service = SMSService()
+    totals = {'sent': 0, 'failed': 0}
     
-    for notification_id in notification_ids:
-        result = send_sms_notification.delay(notification_id)
-        results.append({
-            'notification_id': notification_id,
-            'task_id': result.id
-        })
+    try:
+        for start in range(0, len(notification_ids), SMS_MAX_RECIPIENTS):
+            notifications = list(Notification.objects.filter(
+                id__in=notification_ids[start:start + SMS_MAX_RECIPIENTS],
+                notification_type='sms'
+            ).exclude(status__in=['sent', 'delivered']).select_related('recipient'))
+            
+            try:
+                result = sms_service.send_notifications(notifications)
+            except Exception as e:
+                logger.error(f"Bulk SMS batch failed: {e}")
+                result = {'sent': 0, 'failed': _fail_pending(notifications, str(e))}
+            totals['sent'] += result['sent']
+            totals['failed'] += result['failed']
+    finally:
+        if campaign_id:
+            Campaign.objects.refresh_counts(campaign_id, 'sms')
     
-    return {'results': results, 'total_count': len(notification_ids)}
+    logger.info(f"Bulk SMS: {totals['sent']} sent, {totals['failed']} failed")
+    return {**totals, 'total_count': len(notification_ids)}
 
 @shared_task
-def send_bulk_email_notifications(notification_ids):
+def send_bulk_email_notifications(notification_ids, campaign_id=None):
     """
     Send multiple email notifications in bulk
     
+    Notifications are loaded EMAIL_BATCH_SIZE at a time and sent over the
+    worker's pooled SMTP session. Notifications that were already sent are
+    skipped, and a batch that raises is marked failed so its campaign can
+    still complete.
+    
     Args:
         notification_ids (list): List of notification UUIDs
+        campaign_id (str): Campaign whose progress counters to update
         
     Returns:
-        dict: Results for all notifications
+        dict: Sent and failed counts
     """
-    results = []
+    email_service = EmailService()
+    totals = {'sent': 0, 'failed': 0}
     
-    for notification_id in notification_ids:
-        result = send_email_notification.delay(notification_id)
-        results.append({
-            'notification_id': notification_id,
-            'task_id': result.id
-        })
+    try:
+        for start in range(0, len(notification_ids), EMAIL_BATCH_SIZE):
+            notifications = list(Notification.objects.filter(
+                id__in=notification_ids[start:start + EMAIL_BATCH_SIZE],
+                notification_type='email'
+            ).exclude(status__in=['sent', 'delivered']).select_related('recipient'))
+            
+            try:
+                result = email_service.send_notifications(notifications)
+            except Exception as e:
+                logger.error(f"Bulk email batch failed: {e}")
+                result = {'sent': 0, 'failed': _fail_pending(notifications, str(e))}
+            totals['sent'] += result['sent']
+            totals['failed'] += result['failed']
+    finally:
+        if campaign_id:
+            Campaign.objects.refresh_counts(campaign_id, 'email')
+    
+    logger.info(f"Bulk email: {totals['sent']} sent, {totals['failed']} failed")
+    return {**totals, 'total_count': len(notification_ids)}
+
+@shared_task
+def run_campaign(campaign_id):
+    """
+    Walk the next chunk of a campaign's recipients
     
-    return {'results': results, 'total_count': len(notification_ids)}
+    Each run queues the batched sends for one chunk and the run for the
+    next one, so no worker is held for the whole campaign.
+    
+    Args:
+        campaign_id (str): UUID of the campaign
+        
+    Returns:
+        dict: Campaign status and progress
+    """
+    try:
+        campaign = process_campaign_chunk(campaign_id)
+        return {
+            'status': campaign.status,
+            'processed_recipients': campaign.processed_recipients,
+            'total_recipients': campaign.total_recipients
+        }
+        
+    except Campaign.DoesNotExist:
+        logger.error(f"Campaign {campaign_id} not found")
+        return {'error': 'Campaign not found'}
+    except Exception as e:
+        logger.error(f"Error running campaign {campaign_id}: {e}")
+        Campaign.objects.filter(pk=campaign_id).update(status='failed', error_message=str(e))
+        return {'error': str(e)}
 
 @shared_task
 def send_admin_order_notification(order_id):
@@ -1,3 +1,348 @@
-from django.test import TestCase
+import smtplib
+from decimal import Decimal
+from unittest import mock
+from django.core import mail
+from django.db import transaction
+from django.test import TestCase, override_settings
+from customers.models import Admin, Customer
+from orders.models import Order
+from .admin_service import AdminService
+from .campaigns import process_campaign_chunk, start_campaign
+from .mail import PooledEmailConnection, build_email, get_email_pool, send_pooled_email
+from .models import Campaign, Notification, OutboxMessage, SMSNotification
+from .sms_service import SMSService
+from .tasks import send_bulk_sms_notifications, send_sms_notification
 
-# Create your tests here.
+
+class OrderOutboxTests(TestCase):
+    """Order status changes queue their notifications through the outbox"""
+
+    def setUp(self):
+        customer = Customer.objects.create_user(
+            email='outbox@example.com', password='secret', first_name='Out', last_name='Box'
+        )
+        self.order = Order.objects.create(
+            customer=customer,
+            total_amount=10,
+            shipping_address='1 Test Street',
+            billing_address='1 Test Street',
+            phone_number='+254700000000'
+        )
+
+    def test_status_change_is_queued(self):
+        self.order.status = 'confirmed'
+        self.order.save()
+
+        message = OutboxMessage.objects.pending().get()
+        self.assertEqual(message.task_name, 'notifications.tasks.send_order_status_update')
+        self.assertEqual(message.args, [str(self.order.id), 'pending', 'confirmed'])
+
+    def test_rolled_back_change_queues_nothing(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.order.status = 'cancelled'
+                self.order.save()
+                raise RuntimeError('rollback')
+
+        self.assertFalse(OutboxMessage.objects.exists())
+
+
+class CampaignTests(TestCase):
+    """Campaigns walk their recipients in chunks"""
+
+    def setUp(self):
+        self.customers = [
+            Customer.objects.create_user(
+                email=f'fan{i}@example.com', password='secret', first_name='Fan', last_name=str(i),
+                phone_number=f'+25470000000{i}' if i % 2 else ''
+            )
+            for i in range(5)
+        ]
+
+    def test_chunks_queue_batched_sends(self):
+        campaign = start_campaign(None, 'Big sale', subject='Sale')
+        self.assertEqual(OutboxMessage.objects.get().task_name, 'notifications.tasks.run_campaign')
+
+        for _ in range(3):
+            process_campaign_chunk(campaign.id, chunk_size=2)
+
+        campaign.refresh_from_db()
+        self.assertEqual(campaign.status, 'running')
+        self.assertEqual((campaign.total_recipients, campaign.processed_recipients), (5, 5))
+        self.assertEqual((campaign.sms_queued, campaign.email_queued), (2, 5))
+        self.assertEqual(Notification.objects.filter(campaign=campaign).count(), 7)
+        self.assertEqual(
+            OutboxMessage.objects.filter(task_name='notifications.tasks.send_bulk_email_notifications').count(), 3
+        )
+
+        process_campaign_chunk(campaign.id, chunk_size=2)
+        notifications = Notification.objects.filter(campaign=campaign)
+        notifications.filter(notification_type='sms').update(status='sent')
+        notifications.filter(notification_type='email').update(status='delivered')
+        notifications.filter(notification_type='email', recipient=self.customers[0]).update(status='failed')
+        Campaign.objects.refresh_counts(campaign.id, 'sms')
+        Campaign.objects.refresh_counts(campaign.id, 'email')
+
+        campaign.refresh_from_db()
+        self.assertEqual(campaign.status, 'completed')
+        self.assertEqual((campaign.email_sent, campaign.email_failed), (4, 1))
+        self.assertIsNotNone(campaign.completed_at)
+
+    def start_sending(self):
+        """Queue every recipient of a new campaign and return it with its SMS notification ids"""
+        campaign = start_campaign(None, 'Big sale', subject='Sale')
+        for _ in range(4):
+            process_campaign_chunk(campaign.id, chunk_size=2)
+        ids = [
+            str(pk) for pk in
+            Notification.objects.filter(campaign=campaign, notification_type='sms').values_list('pk', flat=True)
+        ]
+        return campaign, ids
+
+    def test_redelivered_batch_is_not_counted_twice(self):
+        campaign, ids = self.start_sending()
+
+        def deliver(notifications):
+            for notification in notifications:
+                notification.status = 'sent'
+                notification.save(update_fields=['status'])
+            return {'sent': len(notifications), 'failed': 0}
+
+        with mock.patch.object(SMSService, 'send_notifications', side_effect=deliver) as send:
+            send_bulk_sms_notifications(ids, str(campaign.id))
+            send_bulk_sms_notifications(ids, str(campaign.id))
+
+        # The second run finds nothing left to send and recounts the same rows
+        self.assertEqual(send.call_args_list[1].args[0], [])
+        campaign.refresh_from_db()
+        self.assertEqual((campaign.sms_sent, campaign.sms_failed), (2, 0))
+
+    def test_raising_batch_is_recorded_as_failed(self):
+        campaign, ids = self.start_sending()
+        Notification.objects.filter(campaign=campaign, notification_type='email').update(status='sent')
+        Campaign.objects.refresh_counts(campaign.id, 'email')
+
+        with mock.patch.object(SMSService, 'send_notifications', side_effect=ConnectionError('gateway down')):
+            result = send_bulk_sms_notifications(ids, str(campaign.id))
+
+        self.assertEqual((result['sent'], result['failed']), (0, 2))
+        self.assertEqual(
+            set(Notification.objects.filter(pk__in=ids).values_list('status', 'error_message')),
+            {('failed', 'gateway down')}
+        )
+        campaign.refresh_from_db()
+        self.assertEqual((campaign.sms_sent, campaign.sms_failed), (0, 2))
+        self.assertEqual(campaign.status, 'completed')
+
+    def test_retried_notification_refreshes_counts(self):
+        campaign, ids = self.start_sending()
+        with mock.patch.object(SMSService, 'send_notifications', side_effect=ConnectionError('gateway down')):
+            send_bulk_sms_notifications(ids, str(campaign.id))
+
+        def deliver(phone_number, message, notification_id):
+            Notification.objects.filter(pk=notification_id).update(status='sent')
+            return {'success': True}
+
+        with mock.patch.object(SMSService, 'send_sms', side_effect=deliver):
+            send_sms_notification(ids[0])
+
+        campaign.refresh_from_db()
+        self.assertEqual((campaign.sms_sent, campaign.sms_failed), (1, 1))
+
+
+class AdminNotificationTests(TestCase):
+    """Admin fan-out sends and records in a fixed number of queries"""
+
+    def create_admins(self, count):
+        start = Admin.objects.count()
+        for i in range(start, start + count):
+            user = Customer.objects.create_user(
+                email=f'admin{i}@example.com', password='secret', first_name='Ad', last_name='Min'
+            )
+            Admin.objects.create(user=user)
+
+    def test_queries_do_not_grow_with_admins(self):
+        service = AdminService()
+        self.create_admins(2)
+        with self.assertNumQueries(2):
+            service.send_admin_notification('Alert', 'Something happened')
+
+        self.create_admins(5)
+        with self.assertNumQueries(2):
+            result = service.send_admin_notification('Alert', 'Something happened')
+
+        self.assertEqual(result['success_count'], 7)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(len(mail.outbox[1].bcc), 7)
+        self.assertEqual(Notification.objects.filter(status='sent').count(), 9)
+
+    @override_settings(EMAIL_HOST_USER='alerts@orderflow.local')
+    def test_admins_are_blind_copied(self):
+        self.create_admins(3)
+        AdminService().send_admin_notification('Alert', 'Something happened')
+
+        message = mail.outbox[0]
+        self.assertEqual(message.to, ['alerts@orderflow.local'])
+        self.assertEqual(sorted(message.bcc), ['admin0@example.com', 'admin1@example.com', 'admin2@example.com'])
+        self.assertNotIn('admin0@example.com', message.message().as_string())
+
+    def test_failed_batch_is_recorded(self):
+        self.create_admins(3)
+        with mock.patch('notifications.admin_service.ADMIN_EMAIL_BATCH_SIZE', 2), \
+                mock.patch('notifications.admin_service.send_pooled_email',
+                           side_effect=[1, smtplib.SMTPException('relay denied')]):
+            result = AdminService().send_admin_notification('Alert', 'Something happened')
+
+        self.assertEqual((result['total_admins'], result['success_count']), (3, 2))
+        self.assertEqual(
+            sorted(Notification.objects.values_list('status', 'error_message')),
+            [('failed', 'relay denied'), ('sent', ''), ('sent', '')]
+        )
+
+
+class BulkSMSTests(TestCase):
+    """SMS notifications are sent in multi-recipient requests and matched back by number"""
+
+    def setUp(self):
+        self.service = SMSService()
+        self.service.sms = mock.Mock()
+
+    def notify(self, *phone_numbers):
+        """Create one pending SMS notification per phone number"""
+        for i, phone_number in enumerate(phone_numbers):
+            customer = Customer.objects.create_user(
+                email=f'sms{Customer.objects.count()}@example.com', password='secret',
+                first_name='Sms', last_name=str(i), phone_number=phone_number
+            )
+            Notification.objects.create(
+                notification_type='sms', recipient=customer, message='Sale today', status='pending'
+            )
+        return list(Notification.objects.select_related('recipient').order_by('recipient_id'))
+
+    def provider_response(self, *recipients, message='Sent'):
+        self.service.sms.send.return_value = {
+            'SMSMessageData': {'Message': message, 'Recipients': list(recipients)}
+        }
+
+    def delivered(self, number, message_id):
+        return {'number': number, 'status': 'Success', 'statusCode': 101,
+                'messageId': message_id, 'cost': 'KES 0.8000'}
+
+    def statuses(self):
+        return list(
+            Notification.objects.order_by('recipient_id').values_list('status', 'error_message')
+        )
+
+    def test_formatted_numbers_match_provider_results(self):
+        notifications = self.notify('+254 700-000 001', '+254700000002')
+        self.provider_response(self.delivered('+254700000001', 'm1'), self.delivered('+254700000002', 'm2'))
+
+        totals = self.service.send_notifications(notifications)
+
+        self.assertEqual(totals, {'sent': 2, 'failed': 0})
+        self.service.sms.send.assert_called_once_with('Sale today', ['+254700000001', '+254700000002'])
+        self.assertEqual(self.statuses(), [('sent', ''), ('sent', '')])
+        details = SMSNotification.objects.get(notification=notifications[0])
+        self.assertEqual((details.message_id, details.cost), ('m1', Decimal('0.8')))
+
+    def test_partial_failure_and_missing_recipients(self):
+        notifications = self.notify('+254700000001', '+254700000002', '+254700000003', '')
+        self.provider_response(
+            self.delivered('+254700000001', 'm1'),
+            {'number': '+254700000002', 'status': 'InvalidPhoneNumber', 'statusCode': 403},
+            message='Sent to 1/3'
+        )
+
+        totals = self.service.send_notifications(notifications)
+
+        self.assertEqual(totals, {'sent': 1, 'failed': 3})
+        self.assertEqual(self.statuses(), [
+            ('sent', ''),
+            ('failed', 'InvalidPhoneNumber: 403'),
+            ('failed', 'Sent to 1/3'),
+            ('failed', 'Recipient has no phone number'),
+        ])
+
+    def test_duplicate_numbers_are_sent_and_charged_once(self):
+        notifications = self.notify('+254700000001', '+254 700 000 001')
+        self.provider_response(self.delivered('+254700000001', 'm1'))
+
+        totals = self.service.send_notifications(notifications)
+
+        self.assertEqual(totals, {'sent': 2, 'failed': 0})
+        self.service.sms.send.assert_called_once_with('Sale today', ['+254700000001'])
+        costs = SMSNotification.objects.order_by('notification__recipient_id').values_list('cost', flat=True)
+        self.assertEqual(list(costs), [Decimal('0.8'), None])
+
+    def test_provider_error_fails_the_batch(self):
+        notifications = self.notify('+254700000001', '+254700000002')
+        self.service.sms.send.side_effect = ConnectionError('timeout')
+
+        totals = self.service.send_notifications(notifications)
+
+        self.assertEqual(totals, {'sent': 0, 'failed': 2})
+        self.assertEqual(self.statuses(), [('failed', 'timeout'), ('failed', 'timeout')])
+
+
+@override_settings(EMAIL_POOL_MAX_MESSAGES=3, EMAIL_POOL_IDLE_CHECK=3600)
+class EmailPoolTests(TestCase):
+    """The pooled SMTP session reconnects and recycles; web requests do not pool"""
+
+    def setUp(self):
+        self.pool = PooledEmailConnection()
+        self.message = build_email('Hello', 'Body', ['pool@example.com'], 'shop@example.com')
+
+    def connections(self, *sessions):
+        """Patch get_connection to hand out the given backend sessions in order"""
+        patcher = mock.patch('notifications.mail.get_connection', side_effect=list(sessions))
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def session(self, error=None):
+        """A backend session that accepts messages, or raises error"""
+        session = mock.Mock()
+        session.send_messages.return_value = 1
+        session.send_messages.side_effect = error
+        return session
+
+    def test_reconnects_when_server_closes_session(self):
+        closed = self.session(smtplib.SMTPResponseException(421, b'Service not available'))
+        fresh = self.session()
+        get_connection = self.connections(closed, fresh)
+
+        self.assertTrue(self.pool.send(self.message))
+        self.assertEqual(get_connection.call_count, 2)
+        closed.close.assert_called_once()
+        fresh.send_messages.assert_called_once_with([self.message])
+
+    def test_reconnects_when_session_drops(self):
+        dropped = self.session(smtplib.SMTPServerDisconnected('Connection unexpectedly closed'))
+        fresh = self.session()
+        self.connections(dropped, fresh)
+
+        self.assertTrue(self.pool.send(self.message))
+        self.assertIs(self.pool.connection, fresh)
+
+    def test_other_smtp_errors_are_raised(self):
+        self.connections(self.session(smtplib.SMTPResponseException(550, b'Mailbox unavailable')))
+
+        with self.assertRaises(smtplib.SMTPResponseException):
+            self.pool.send(self.message)
+
+    def test_session_is_recycled_after_max_messages(self):
+        sessions = [self.session(), self.session(), self.session()]
+        get_connection = self.connections(*sessions)
+
+        for _ in range(7):
+            self.pool.send(self.message)
+
+        self.assertEqual(get_connection.call_count, 3)
+        self.assertEqual([session.send_messages.call_count for session in sessions], [3, 3, 1])
+        sessions[0].close.assert_called_once()
+        sessions[1].close.assert_called_once()
+
+    def test_web_requests_do_not_use_the_pool(self):
+        self.assertEqual(send_pooled_email('Hello', 'Body', ['web@example.com'], 'shop@example.com'), 1)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIsNone(get_email_pool().connection)
@@ -5,17 +5,40 @@ from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
-from .models import Notification
+from orderflow.fieldsets import wants_field
+from orderflow.pagination import KeysetPagination
+from .models import Campaign, Notification
 from .serializers import (
-    NotificationSerializer, NotificationStatsSerializer, SendNotificationSerializer
+    NotificationSerializer, NotificationStatsSerializer, SendNotificationSerializer,
+    CampaignSerializer
 )
+from .campaigns import start_campaign
 from .notification_manager import NotificationManager
 
 Customer = get_user_model()
 
+# Related objects each serialized notification field reads
+NOTIFICATION_RELATIONS = {
+    'recipient_name': 'recipient',
+    'order_number': 'order',
+    'sms_details': 'sms_details',
+    'email_details': 'email_details',
+}
+
+
+def with_requested_relations(queryset, request):
+    """Join only the related objects behind the fields the request asks for"""
+    relations = [
+        relation for field, relation in NOTIFICATION_RELATIONS.items()
+        if wants_field(request, field)
+    ]
+    return queryset.select_related(*relations)
+
+
 class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
     """ViewSet for Notification model - read-only for customers"""
     serializer_class = NotificationSerializer
+    pagination_class = KeysetPagination
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['notification_type', 'status', 'order']
@@ -25,9 +48,10 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
     
     def get_queryset(self):
         """Return notifications for the current user"""
+        queryset = with_requested_relations(Notification.objects.all(), self.request)
         if self.request.user.is_staff:
-            return Notification.objects.all()
-        return Notification.objects.filter(recipient=self.request.user)
+            return queryset
+        return queryset.filter(recipient=self.request.user)
     
     @action(detail=False, methods=['get'])
     def stats(self, request):
@@ -90,6 +114,7 @@ class NotificationAdminViewSet(viewsets.ModelViewSet):
     """Admin ViewSet for managing notifications"""
     queryset = Notification.objects.all()
     serializer_class = NotificationSerializer
+    pagination_class = KeysetPagination
     permission_classes = [IsAdminUser]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['notification_type', 'status', 'recipient', 'order']
@@ -97,46 +122,29 @@ class NotificationAdminViewSet(viewsets.ModelViewSet):
     ordering_fields = ['created_at', 'sent_at', 'status']
     ordering = ['-created_at']
     
+    def get_queryset(self):
+        """Return all notifications, joining the related objects the response needs"""
+        return with_requested_relations(Notification.objects.all(), self.request)
+    
     @action(detail=False, methods=['post'])
     def send_custom(self, request):
         """Send custom notification to customers"""
         serializer = SendNotificationSerializer(data=request.data)
         if serializer.is_valid():
-            notification_manager = NotificationManager()
-            results = []
-            
-            # Get customers to notify
-            if serializer.validated_data.get('customer_ids'):
-                customers = Customer.objects.filter(
-                    id__in=serializer.validated_data['customer_ids']
-                )
-            else:
-                # Send to all customers if no specific IDs provided
-                customers = Customer.objects.all()
-            
-            # Send notifications
-            for customer in customers:
-                result = notification_manager.send_custom_notification(
-                    customer=customer,
-                    message=serializer.validated_data['message'],
-                    subject=serializer.validated_data.get('subject', ''),
-                    send_sms=serializer.validated_data.get('send_sms', True),
-                    send_email=serializer.validated_data.get('send_email', True)
-                )
-                
-                results.append({
-                    'customer_id': str(customer.id),
-                    'customer_email': customer.email,
-                    'success': result['success'],
-                    'sms_result': result.get('sms'),
-                    'email_result': result.get('email'),
-                    'error': result.get('error')
-                })
+            # Sent in the background; poll /campaigns/{id}/ for progress
+            campaign = start_campaign(
+                created_by=request.user,
+                message=serializer.validated_data['message'],
+                subject=serializer.validated_data.get('subject', ''),
+                send_sms=serializer.validated_data.get('send_sms', True),
+                send_email=serializer.validated_data.get('send_email', True),
+                customer_ids=serializer.validated_data.get('customer_ids')
+            )
             
-            return Response({
-                'message': f'Notifications sent to {len(customers)} customers',
-                'results': results
-            })
+            return Response(
+                CampaignSerializer(campaign, context={'request': request}).data,
+                status=status.HTTP_202_ACCEPTED
+            )
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
@@ -192,3 +200,15 @@ class NotificationAdminViewSet(viewsets.ModelViewSet):
                 {'error': result.get('error', 'Failed to send email')},
                 status=status.HTTP_400_BAD_REQUEST
             )
+
+
+class CampaignViewSet(viewsets.ReadOnlyModelViewSet):
+    """Admin ViewSet for following custom notification campaigns"""
+    queryset = Campaign.objects.select_related('created_by')
+    serializer_class = CampaignSerializer
+    pagination_class = KeysetPagination
+    permission_classes = [IsAdminUser]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['status']
+    ordering_fields = ['created_at', 'status']
+    ordering = ['-created_at']
@@ -37,6 +37,7 @@ app.conf.update(
         'notifications.tasks.send_delivery_notification': {'queue': 'notifications'},
         'notifications.tasks.send_bulk_email_notifications': {'queue': 'email'},
         'notifications.tasks.send_bulk_sms_notifications': {'queue': 'sms'},
+        'notifications.tasks.run_campaign': {'queue': 'notifications'},
     },
     
     # Queue definitions
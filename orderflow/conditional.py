@@ -0,0 +1,87 @@
+import hashlib
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified support for list and retrieve on ModelViewSets
+
+    A cheap validator is computed before the real query runs: the filtered
+    row count and max(updated_at) for lists, the row's updated_at for
+    details. When the client's If-None-Match or If-Modified-Since still
+    matches, a 304 is returned without querying or serializing the data.
+
+    Views whose responses also depend on get_validator_extra() are
+    validated by ETag only, since the row's updated_at does not move when
+    that extra state changes.
+    """
+    validator_field = 'updated_at'
+
+    def get_validator_queryset(self):
+        """Queryset the validators are computed over; override to drop costly annotations"""
+        return self.get_queryset()
+
+    def get_validator_extra(self):
+        """Extra state the response depends on that is not reflected in updated_at"""
+        return ''
+
+    def make_etag(self, request, extra, *parts):
+        """Build a weak ETag from the validator parts and everything that shapes the response"""
+        key = '|'.join(str(part) for part in (
+            request.get_full_path(),
+            getattr(request, 'accepted_media_type', ''),
+            extra,
+            *parts
+        ))
+        return f'W/"{hashlib.md5(key.encode()).hexdigest()}"'
+
+    def conditional_response(self, request, etag, last_modified, view):
+        """Return a 304 if the client's copy is current, otherwise render the view with validators"""
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        not_modified = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if not_modified is not None:
+            not_modified['ETag'] = etag
+            return not_modified
+
+        response = view()
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        stats = self.filter_queryset(self.get_validator_queryset()).order_by().aggregate(
+            count=Count('pk'), last_modified=Max(self.validator_field)
+        )
+        last_modified = stats['last_modified']
+        etag = self.make_etag(
+            request, self.get_validator_extra(), stats['count'], last_modified and last_modified.isoformat()
+        )
+
+        # Deletions do not move max(updated_at), so lists are validated by ETag only
+        return self.conditional_response(
+            request, etag, None, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        view = lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            last_modified = self.filter_queryset(self.get_validator_queryset()).filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            ).values_list(self.validator_field, flat=True).first()
+        except (TypeError, ValueError, DjangoValidationError):
+            last_modified = None
+
+        # Let the regular lookup produce the 404
+        if last_modified is None:
+            return view()
+
+        extra = self.get_validator_extra()
+        etag = self.make_etag(request, extra, last_modified.isoformat())
+        # updated_at does not cover the extra state, so Last-Modified could go stale
+        return self.conditional_response(request, etag, None if extra else last_modified, view)
@@ -0,0 +1,75 @@
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+EXCLUDE_PARAM = 'exclude'
+
+
+def _parse_names(value):
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def requested_fields(request):
+    """
+    Read the sparse fieldset of a request
+
+    Only read requests are trimmed; writes always validate and return the
+    full representation.
+
+    Args:
+        request: DRF request, or None
+
+    Returns:
+        tuple: (fields, exclude) where fields is a set of names or None
+            for "all fields", and exclude is a set of names
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None, set()
+    params = request.query_params
+    fields = _parse_names(params[FIELDS_PARAM]) if params.get(FIELDS_PARAM) else None
+    return fields, _parse_names(params.get(EXCLUDE_PARAM, ''))
+
+
+def wants_field(request, name):
+    """True unless the request's ?fields= / ?exclude= leave the field out"""
+    fields, exclude = requested_fields(request)
+    return (fields is None or name in fields) and name not in exclude
+
+
+def trim_fields(data, request):
+    """Apply a request's sparse fieldset to an already rendered dict"""
+    fields, exclude = requested_fields(request)
+    if fields is None and not exclude:
+        return data
+    return {
+        name: value for name, value in data.items()
+        if (fields is None or name in fields) and name not in exclude
+    }
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin that trims the output to ?fields= / ?exclude=
+
+    Both parameters take comma-separated top-level field names; unknown
+    names are ignored. Nested serializers are left untouched, so
+    ?fields=items keeps every field of each item.
+    """
+
+    def is_top_level(self):
+        """True for the root serializer, or the child of a root list serializer"""
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self.is_top_level():
+            return fields
+
+        requested, exclude = requested_fields(self.context.get('request'))
+        for name in list(fields):
+            if (requested is not None and name not in requested) or name in exclude:
+                fields.pop(name)
+        return fields
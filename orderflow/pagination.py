@@ -0,0 +1,101 @@
+import base64
+from datetime import datetime
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Page-number pagination with opt-in keyset (cursor) pagination
+
+    Clients that pass ?cursor= (empty for the first page) get pages keyed on
+    (created_at, id), newest first. Keyset pages skip the COUNT(*) and the
+    OFFSET scan, so deep pages cost the same as the first one. A cursor
+    cannot be combined with ?ordering=.
+
+    Actions listed in the view's keyset_excluded_actions keep their own
+    ordering (e.g. search rank) and always use page numbers.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_keyset = (
+            self.cursor_query_param in request.query_params
+            and getattr(view, 'action', None) not in getattr(view, 'keyset_excluded_actions', ())
+        )
+        if not self.use_keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        if request.query_params.get(api_settings.ORDERING_PARAM):
+            raise ValidationError({
+                'error': f'{self.cursor_query_param} cannot be combined with {api_settings.ORDERING_PARAM}'
+            })
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.request = request
+        queryset = queryset.order_by('-created_at', '-id')
+
+        position = self.decode_cursor(request)
+        if position is not None:
+            created_at, pk = position
+            try:
+                # The redundant created_at bound keeps the scan on the composite index
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk),
+                    created_at__lte=created_at
+                )
+            except (DjangoValidationError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+
+        items = list(queryset[:page_size + 1])
+        self.has_next = len(items) > page_size
+        self.page_items = items[:page_size]
+        return self.page_items
+
+    def get_paginated_response(self, data):
+        if not self.use_keyset:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_cursor_link(),
+            'results': data
+        })
+
+    def get_next_cursor_link(self):
+        """Build the URL of the next keyset page, or None on the last page"""
+        if not self.has_next:
+            return None
+        last = self.page_items[-1]
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(last))
+
+    def encode_cursor(self, instance):
+        """Encode an instance's (created_at, id) position as an opaque cursor"""
+        position = f"{instance.created_at.isoformat()}|{instance.pk}"
+        return base64.urlsafe_b64encode(position.encode()).decode()
+
+    def decode_cursor(self, request):
+        """
+        Decode the cursor query parameter
+
+        Returns:
+            tuple: (created_at, id) position, or None for the first page
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            position = base64.urlsafe_b64decode(encoded.encode()).decode()
+            created_at, pk = position.split('|', 1)
+            return datetime.fromisoformat(created_at), pk
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
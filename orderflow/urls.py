@@ -35,7 +35,7 @@ from customers.oidc_views import CustomerOIDCLoginView, oidc_token_login, oidc_u
 from customers.google_oauth import google_login, google_token_login, google_user_info
 from products.views import CategoryViewSet, ProductViewSet
 from orders.views import OrderViewSet
-from notifications.views import NotificationViewSet, NotificationAdminViewSet
+from notifications.views import NotificationViewSet, NotificationAdminViewSet, CampaignViewSet
 
 # Create router for ViewSets
 router = DefaultRouter()
@@ -45,6 +45,7 @@ router.register(r'products', ProductViewSet, basename='product')
 router.register(r'orders', OrderViewSet, basename='order')
 router.register(r'notifications', NotificationViewSet, basename='notification')
 router.register(r'admin/notifications', NotificationAdminViewSet, basename='admin-notification')
+router.register(r'campaigns', CampaignViewSet, basename='campaign')
 
 # Admin router
 admin_router = DefaultRouter()
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from orders.models import Order
+
+
+class Command(BaseCommand):
+    help = 'Build or rebuild the denormalized order snapshots served by the order endpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--missing',
+            action='store_true',
+            help='Only build snapshots for orders that do not have one yet'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Orders loaded and written per batch (default: 500)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            queryset = Order.objects.with_snapshot_sources().order_by('pk')
+            if options['missing']:
+                queryset = queryset.filter(snapshot={})
+
+            # Keyset batches on pk, so rows leaving the --missing filter are not skipped
+            count = 0
+            last_pk = None
+            while True:
+                batch_queryset = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+                batch = list(batch_queryset[:options['batch_size']])
+                if not batch:
+                    break
+
+                for order in batch:
+                    # Names and SKUs already captured in a snapshot are kept
+                    order.snapshot = order.build_snapshot(order.items.all())
+                Order.objects.bulk_update(batch, ['snapshot'])
+
+                count += len(batch)
+                last_pk = batch[-1].pk
+                self.stdout.write(f'Rebuilt {count} order snapshots...')
+
+            self.stdout.write(
+                self.style.SUCCESS(f'Successfully rebuilt {count} order snapshots')
+            )
+
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'Failed to rebuild order snapshots: {e}')
+            )
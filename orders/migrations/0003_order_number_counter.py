@@ -0,0 +1,44 @@
+# Generated by Django 5.2.5 on 2026-10-17 04:19
+
+from datetime import timedelta
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def seed_order_number_counters(apps, schema_editor):
+    """Continue numbering after the orders already placed around today"""
+    Order = apps.get_model('orders', 'Order')
+    OrderNumberCounter = apps.get_model('orders', 'OrderNumberCounter')
+    today = timezone.localdate()
+
+    for offset in (-1, 0, 1):
+        day = today + timedelta(days=offset)
+        numbers = Order.objects.filter(
+            order_number__startswith=f"ORD-{day:%Y%m%d}-"
+        ).values_list('order_number', flat=True)
+        suffixes = [int(number.rsplit('-', 1)[-1]) for number in numbers if number.rsplit('-', 1)[-1].isdigit()]
+        if suffixes:
+            OrderNumberCounter.objects.create(day=day, last_number=max(suffixes))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderNumberCounter',
+            fields=[
+                ('day', models.DateField(primary_key=True, serialize=False)),
+                ('last_number', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Order Number Counter',
+                'verbose_name_plural': 'Order Number Counters',
+                'db_table': 'order_number_counters',
+            },
+        ),
+        migrations.RunPython(seed_order_number_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.5 on 2026-10-17 04:21
+
+from django.db import migrations, models
+
+
+def mark_reserved_orders(apps, schema_editor):
+    """Stock was taken when existing orders were placed and put back only on cancel"""
+    Order = apps.get_model('orders', 'Order')
+    Order.objects.exclude(status='cancelled').update(stock_reserved=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_order_number_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='stock_reserved',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(mark_reserved_orders, migrations.RunPython.noop),
+    ]
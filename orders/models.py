@@ -1,11 +1,84 @@
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import F
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 from customers.models import Customer
 from products.models import Product
+from products.stock import reserve_stock, release_stock
+from .snapshots import item_snapshots, order_snapshot
 from model_utils import FieldTracker
 import uuid
 
 
+class OrderNumberCounterManager(models.Manager):
+    """Manager that hands out per-day order sequence numbers"""
+    
+    def allocate(self, day=None):
+        """
+        Atomically take the next sequence number for a day
+        
+        On PostgreSQL and SQLite this is a single INSERT ... ON CONFLICT DO
+        UPDATE ... RETURNING statement, so concurrent callers never read the
+        same value and never need to retry. The counter row stays locked
+        until the caller's transaction ends, so allocate late in it.
+        
+        Args:
+            day (date): Day to allocate for (default: today)
+            
+        Returns:
+            int: Next number for that day, starting at 1
+        """
+        day = day or timezone.localdate()
+        
+        if connection.vendor in ('postgresql', 'sqlite'):
+            table = connection.ops.quote_name(self.model._meta.db_table)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO {table} (day, last_number) VALUES (%s, 1) "
+                    f"ON CONFLICT (day) DO UPDATE SET last_number = {table}.last_number + 1 "
+                    f"RETURNING last_number",
+                    [day]
+                )
+                return cursor.fetchone()[0]
+        
+        with transaction.atomic():
+            self.get_or_create(day=day)
+            self.filter(day=day).update(last_number=F('last_number') + 1)
+            return self.filter(day=day).values_list('last_number', flat=True).get()
+
+
+class OrderNumberCounter(models.Model):
+    """
+    Last order sequence number handed out per day
+    Backs race-free ORD-YYYYMMDD-XXXX order numbers
+    """
+    day = models.DateField(primary_key=True)
+    last_number = models.PositiveIntegerField(default=0)
+    
+    objects = OrderNumberCounterManager()
+    
+    class Meta:
+        db_table = 'order_number_counters'
+        verbose_name = 'Order Number Counter'
+        verbose_name_plural = 'Order Number Counters'
+    
+    def __str__(self):
+        return f"{self.day}: {self.last_number}"
+
+
+class OrderQuerySet(models.QuerySet):
+    """QuerySet helpers for order snapshots"""
+    
+    def with_snapshot_sources(self):
+        """Load everything build_snapshot() reads: the customer and the items with their products"""
+        return self.select_related('customer').prefetch_related(
+            models.Prefetch(
+                'items',
+                queryset=OrderItem.objects.select_related('product').order_by('created_at', 'id')
+            )
+        )
+
+
 class Order(models.Model):
     """
     Order model representing customer orders
@@ -45,36 +118,60 @@ class Order(models.Model):
     is_paid = models.BooleanField(default=False)
     payment_method = models.CharField(max_length=50, blank=True)
     payment_reference = models.CharField(max_length=100, blank=True)
+    # True while the order's items are taken out of product stock
+    stock_reserved = models.BooleanField(default=False, editable=False)
+    # Denormalized API representation served by the list and detail endpoints
+    snapshot = models.JSONField(default=dict, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = OrderQuerySet.as_manager()
+    
     class Meta:
         db_table = 'orders'
         verbose_name = 'Order'
         verbose_name_plural = 'Orders'
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination on (created_at, id), globally and per customer
+            models.Index(fields=['created_at', 'id'], name='orders_created_id_idx'),
+            models.Index(fields=['customer', 'created_at', 'id'], name='orders_customer_created_idx'),
+        ]
     
     def __str__(self):
         return f"Order {self.order_number} - {self.customer.full_name}"
     
+    # Order fields rendered into the snapshot (timestamps follow these)
+    SNAPSHOT_FIELDS = [
+        'order_number', 'customer_id', 'status', 'total_amount', 'shipping_address',
+        'billing_address', 'phone_number', 'notes', 'is_paid', 'payment_method',
+        'payment_reference',
+    ]
+    
     def save(self, *args, **kwargs):
+        adding = self._state.adding
         if not self.order_number:
-            # Generate order number: ORD-YYYYMMDD-XXXX
-            from datetime import datetime
-            date_str = datetime.now().strftime('%Y%m%d')
-            last_order = Order.objects.filter(
-                order_number__startswith=f'ORD-{date_str}'
-            ).order_by('-order_number').first()
-            
-            if last_order:
-                last_number = int(last_order.order_number.split('-')[-1])
-                new_number = last_number + 1
-            else:
-                new_number = 1
-            
-            self.order_number = f"ORD-{date_str}-{new_number:04d}"
+            self.order_number = self.next_order_number()
+        
+        update_fields = kwargs.get('update_fields')
+        refresh = adding or any(self.tracker.has_changed(field) for field in self.SNAPSHOT_FIELDS)
+        if update_fields is not None and not set(update_fields) & set(self.SNAPSHOT_FIELDS):
+            refresh = False
         
         super().save(*args, **kwargs)
+        if refresh:
+            self.refresh_snapshot(items=[] if adding else None)
+    
+    @staticmethod
+    def next_order_number():
+        """Allocate the next ORD-YYYYMMDD-XXXX order number for today"""
+        day = timezone.localdate()
+        return f"ORD-{day:%Y%m%d}-{OrderNumberCounter.objects.allocate(day):04d}"
+    
+    @staticmethod
+    def provisional_order_number():
+        """Unique placeholder for an order whose number is allocated just before commit"""
+        return f"PENDING-{uuid.uuid4().hex[:12]}"
     
     @property
     def items_count(self):
@@ -92,16 +189,71 @@ class Order(models.Model):
         self.total_amount = total
         return total
     
+    def ordered_items(self):
+        """Returns the order's items with their products, in the order they were added"""
+        return self.items.select_related('product').order_by('created_at', 'id')
+    
+    def build_snapshot(self, items=None):
+        """
+        Render the order's API representation as a plain dict
+        
+        Args:
+            items (iterable): Current OrderItems with products loaded. When
+                omitted, the line items of the stored snapshot are reused
+                (or loaded, if there are none yet)
+                
+        Returns:
+            dict: Same shape as OrderSerializer output
+        """
+        previous = self.snapshot.get('items', [])
+        if items is None and 'items' in self.snapshot:
+            return order_snapshot(self, previous)
+        if items is None:
+            items = self.ordered_items()
+        return order_snapshot(self, item_snapshots(items, previous))
+    
+    def refresh_snapshot(self, items=None):
+        """Rebuild the snapshot and store it without going through save()"""
+        self.snapshot = self.build_snapshot(items)
+        Order.objects.filter(pk=self.pk).update(snapshot=self.snapshot)
+    
+    def get_snapshot(self):
+        """Returns the stored snapshot, or one built on the fly for orders that predate snapshots"""
+        return self.snapshot or self.build_snapshot()
+    
+    def item_quantities(self):
+        """Returns (product_id, quantity) pairs for the order's items"""
+        return list(self.items.values_list('product_id', 'quantity'))
+    
+    def reserve_stock(self):
+        """
+        Take this order's items out of stock, all or nothing
+        
+        Does nothing if the stock is already reserved. Raises
+        products.stock.InsufficientStock if any item is short.
+        """
+        with transaction.atomic():
+            # Flipping the flag first makes concurrent calls reserve only once
+            if not Order.objects.filter(pk=self.pk, stock_reserved=False).update(stock_reserved=True):
+                return
+            reserve_stock(self.item_quantities())
+            self.stock_reserved = True
+    
+    def release_stock(self):
+        """Put this order's items back in stock if they are reserved"""
+        with transaction.atomic():
+            if not Order.objects.filter(pk=self.pk, stock_reserved=True).update(stock_reserved=False):
+                return
+            release_stock(self.item_quantities())
+            self.stock_reserved = False
+    
     def update_stock(self):
-        """Updates product stock quantities when order is confirmed"""
+        """Reserves product stock when order is confirmed, unless already reserved at placement"""
         if self.status == 'confirmed':
-            for item in self.items.all():
-                product = item.product
-                product.stock_quantity = max(0, product.stock_quantity - item.quantity)
-                product.save()
+            self.reserve_stock()
     
-    # Field tracker for detecting status changes
-    tracker = FieldTracker(fields=['status'])
+    # Field tracker for detecting status changes and stale snapshots
+    tracker = FieldTracker(fields=SNAPSHOT_FIELDS)
 
 
 class OrderItem(models.Model):
@@ -149,6 +301,13 @@ class OrderItem(models.Model):
             self.unit_price = self.product.price
         self.subtotal = self.quantity * self.unit_price
         super().save(*args, **kwargs)
+        self.order.refresh_snapshot(items=self.order.ordered_items())
+    
+    def delete(self, *args, **kwargs):
+        order = self.order
+        result = super().delete(*args, **kwargs)
+        order.refresh_snapshot(items=order.ordered_items())
+        return result
     
     @property
     def product_name(self):
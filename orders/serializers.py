@@ -1,6 +1,9 @@
+from django.db import transaction
 from rest_framework import serializers
+from orderflow.fieldsets import SparseFieldsetMixin
 from .models import Order, OrderItem
 from products.models import Product
+from products.stock import InsufficientStock, reserve_stock
 from customers.models import Customer
 
 
@@ -46,29 +49,16 @@ class OrderItemCreateSerializer(serializers.ModelSerializer):
         read_only_fields = ['unit_price', 'subtotal']
     
     def validate(self, attrs):
-        """Validate order item data"""
-        product_id = attrs.get('product_id')
+        """Validate order item data; products are resolved in bulk by OrderCreateSerializer"""
         quantity = attrs.get('quantity', 0)
         
-        try:
-            product = Product.objects.get(id=product_id, status='active')
-        except Product.DoesNotExist:
-            raise serializers.ValidationError("Product not found or not available.")
-        
         if quantity <= 0:
             raise serializers.ValidationError("Quantity must be greater than zero.")
         
-        if product.stock_quantity < quantity:
-            raise serializers.ValidationError(f"Insufficient stock. Available: {product.stock_quantity}")
-        
-        attrs['product'] = product
-        attrs['unit_price'] = product.price
-        attrs['subtotal'] = product.price * quantity
-        
         return attrs
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for Order model"""
     items = OrderItemSerializer(many=True, read_only=True)
     customer_name = serializers.CharField(source='customer.full_name', read_only=True)
@@ -113,8 +103,36 @@ class OrderCreateSerializer(serializers.ModelSerializer):
         if not items:
             raise serializers.ValidationError("Order must contain at least one item.")
         
+        # Merge repeated lines for the same product
+        quantities = {}
+        for item in items:
+            quantities[item['product_id']] = quantities.get(item['product_id'], 0) + item['quantity']
+        
+        # Load every product in one query
+        products = Product.objects.filter(status='active').in_bulk(list(quantities))
+        
+        errors = []
+        for product_id, quantity in quantities.items():
+            product = products.get(product_id)
+            if product is None:
+                errors.append(f"Product {product_id} not found or not available.")
+            elif product.stock_quantity < quantity:
+                errors.append(f"Insufficient stock for {product.name}. Available: {product.stock_quantity}")
+        if errors:
+            raise serializers.ValidationError({'items': errors})
+        
+        attrs['items'] = [
+            {
+                'product': products[product_id],
+                'quantity': quantity,
+                'unit_price': products[product_id].price,
+                'subtotal': products[product_id].price * quantity
+            }
+            for product_id, quantity in quantities.items()
+        ]
+        
         # Calculate total amount
-        total_amount = sum(item['subtotal'] for item in items)
+        total_amount = sum(item['subtotal'] for item in attrs['items'])
         attrs['total_amount'] = total_amount
         
         return attrs
@@ -124,47 +142,58 @@ class OrderCreateSerializer(serializers.ModelSerializer):
         items_data = validated_data.pop('items')
         customer = self.context['request'].user
         
-        # Create order
-        order = Order.objects.create(
-            customer=customer,
-            **validated_data
-        )
-        
-        # Create order items
-        for item_data in items_data:
-            OrderItem.objects.create(order=order, **item_data)
-        
-        # Calculate and save total
-        order.calculate_total()
-        order.save()
-        
-        # Trigger notifications after all items are created
-        # This ensures the admin email includes the order items
-        try:
-            from notifications.tasks import send_order_confirmation, send_admin_order_notification
-            
-            # Queue customer notifications (SMS + Email)
-            customer_task = send_order_confirmation.delay(
-                str(order.id), 
-                send_sms=True, 
-                send_email=True
+        # Query count is constant regardless of the number of lines
+        with transaction.atomic():
+            # Create order; the total was computed in validate(). The real
+            # number is allocated last so the per-day counter row stays locked
+            # only until commit, not through the item and stock writes.
+            order = Order.objects.create(
+                customer=customer,
+                order_number=Order.provisional_order_number(),
+                stock_reserved=True,
+                **validated_data
             )
             
-            # Queue admin notifications
-            admin_task = send_admin_order_notification.delay(str(order.id))
+            # Create order items
+            items = OrderItem.objects.bulk_create([
+                OrderItem(order=order, **item_data) for item_data in items_data
+            ])
+            
+            # Take the stock atomically; a short item rolls back the whole order
+            try:
+                reserve_stock([(item.product_id, item.quantity) for item in items])
+            except InsufficientStock as e:
+                raise serializers.ValidationError({'items': [str(e)]})
             
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.info(f"Order confirmation tasks queued for order {order.order_number}")
-            logger.info(f"  - Customer task ID: {customer_task.id}")
-            logger.info(f"  - Admin task ID: {admin_task.id}")
+            self.queue_notifications(order)
             
-        except Exception as e:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Error queueing notifications for order {order.order_number}: {e}")
+            order.order_number = Order.next_order_number()
+            order.snapshot = order.build_snapshot(items)
+            Order.objects.filter(pk=order.pk).update(
+                order_number=order.order_number, snapshot=order.snapshot
+            )
+        
+        # Serve order.items from the created objects instead of querying them again
+        queryset = order.items.all()
+        queryset._result_cache = items
+        queryset._prefetch_done = True
+        order._prefetched_objects_cache = {'items': queryset}
         
         return order
+    
+    def queue_notifications(self, order):
+        """Queue customer and admin notifications in the order's transaction"""
+        from notifications.models import OutboxMessage
+        from notifications.tasks import send_order_confirmation, send_admin_order_notification
+        
+        # Published by the outbox relay once the order is committed
+        OutboxMessage.objects.enqueue(
+            send_order_confirmation,
+            str(order.id),
+            send_sms=True,
+            send_email=True
+        )
+        OutboxMessage.objects.enqueue(send_admin_order_notification, str(order.id))
 
 
 class OrderStatusUpdateSerializer(serializers.ModelSerializer):
@@ -195,3 +224,22 @@ class OrderStatusUpdateSerializer(serializers.ModelSerializer):
             )
         
         return value
+    
+    def update(self, instance, validated_data):
+        """
+        Apply the status change together with its stock reservation
+        
+        Confirming reserves the items' stock and cancelling puts a held
+        reservation back, in the same transaction as the status write, just
+        like the cancel action. Raises products.stock.InsufficientStock if a
+        confirmation cannot be met.
+        """
+        old_status = instance.status
+        new_status = validated_data.get('status', old_status)
+        
+        with transaction.atomic():
+            if old_status != 'confirmed' and new_status == 'confirmed':
+                instance.reserve_stock()
+            elif old_status != 'cancelled' and new_status == 'cancelled':
+                instance.release_stock()
+            return super().update(instance, validated_data)
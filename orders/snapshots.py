@@ -0,0 +1,82 @@
+from rest_framework.fields import DateTimeField, DecimalField
+
+# Format values exactly as the API serializers render them
+_datetime_field = DateTimeField()
+_money_field = DecimalField(max_digits=10, decimal_places=2)
+
+
+def _datetime(value):
+    return _datetime_field.to_representation(value) if value else None
+
+
+def _money(value):
+    return _money_field.to_representation(value) if value is not None else None
+
+
+def item_snapshots(items, previous=()):
+    """
+    Render order items for the order snapshot
+
+    Product names and SKUs already captured in a previous snapshot are kept
+    as they were, so renaming a product does not rewrite past orders.
+
+    Args:
+        items (iterable): OrderItem instances with their products loaded
+        previous (list): Item entries of the order's current snapshot
+
+    Returns:
+        list: One dict per item, shaped like OrderItemSerializer output
+    """
+    known = {entry['id']: entry for entry in previous}
+    entries = []
+    for item in items:
+        entry = known.get(str(item.pk))
+        if entry:
+            name, sku = entry['product_name'], entry['product_sku']
+        else:
+            name, sku = item.product.name, item.product.sku
+        entries.append({
+            'id': str(item.pk),
+            'product': str(item.product_id),
+            'product_name': name,
+            'product_sku': sku,
+            'quantity': item.quantity,
+            'unit_price': _money(item.unit_price),
+            'subtotal': _money(item.subtotal),
+            'created_at': _datetime(item.created_at)
+        })
+    return entries
+
+
+def order_snapshot(order, items):
+    """
+    Render an order and its item entries as the API representation
+
+    Args:
+        order (Order): Order with its customer loaded
+        items (list): Entries from item_snapshots()
+
+    Returns:
+        dict: Same shape as OrderSerializer output
+    """
+    return {
+        'id': str(order.pk),
+        'order_number': order.order_number,
+        'customer': order.customer_id,
+        'customer_name': order.customer.full_name,
+        'customer_email': order.customer.email,
+        'status': order.status,
+        'total_amount': _money(order.total_amount),
+        'shipping_address': order.shipping_address,
+        'billing_address': order.billing_address,
+        'phone_number': order.phone_number,
+        'notes': order.notes,
+        'is_paid': order.is_paid,
+        'payment_method': order.payment_method,
+        'payment_reference': order.payment_reference,
+        'created_at': _datetime(order.created_at),
+        'updated_at': _datetime(order.updated_at),
+        'items': items,
+        'items_count': len(items),
+        'can_be_cancelled': order.can_be_cancelled
+    }
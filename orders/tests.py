@@ -1,3 +1,309 @@
-from django.test import TestCase
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from unittest import mock
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from customers.models import Customer
+from products.models import Category, Product
+from products.stock import InsufficientStock
+from .models import Order, OrderItem, OrderNumberCounter
 
-# Create your tests here.
+
+def create_order(customer):
+    """Create a minimal order for a customer"""
+    return Order.objects.create(
+        customer=customer,
+        total_amount=10,
+        shipping_address='1 Test Street',
+        billing_address='1 Test Street',
+        phone_number='+254700000000'
+    )
+
+
+def create_product(name, stock_quantity):
+    """Create an active product with the given stock"""
+    category, _ = Category.objects.get_or_create(name='Test Category')
+    return Product.objects.create(
+        name=name, description=name, price=5, category=category, stock_quantity=stock_quantity
+    )
+
+
+def create_order_with_items(customer, *items):
+    """Create an order with (product, quantity) items"""
+    order = create_order(customer)
+    for product, quantity in items:
+        OrderItem.objects.create(order=order, product=product, quantity=quantity)
+    return order
+
+
+class OrderNumberCounterTests(TestCase):
+    """Tests for per-day order number allocation"""
+
+    def test_numbers_increase_within_a_day(self):
+        day = date(2025, 1, 15)
+        numbers = [OrderNumberCounter.objects.allocate(day) for _ in range(3)]
+        self.assertEqual(numbers, [1, 2, 3])
+
+    def test_numbers_restart_each_day(self):
+        OrderNumberCounter.objects.allocate(date(2025, 1, 15))
+        OrderNumberCounter.objects.allocate(date(2025, 1, 15))
+        self.assertEqual(OrderNumberCounter.objects.allocate(date(2025, 1, 16)), 1)
+
+    def test_order_number_format(self):
+        customer = Customer.objects.create_user(
+            email='buyer@example.com', password='secret', first_name='Test', last_name='Buyer'
+        )
+        # Numbers follow the local date, which can differ from the UTC created_at
+        with mock.patch('orders.models.timezone.localdate', return_value=date(2025, 1, 15)):
+            first = create_order(customer)
+            second = create_order(customer)
+
+        self.assertEqual(first.order_number, 'ORD-20250115-0001')
+        self.assertEqual(second.order_number, 'ORD-20250115-0002')
+
+
+class CheckoutOrderNumberTests(APITestCase):
+    """Checkout locks the day's counter row only at the end of its transaction"""
+
+    def setUp(self):
+        self.customer = Customer.objects.create_user(
+            email='checkout@example.com', password='secret', first_name='Check', last_name='Out'
+        )
+        self.pen = create_product('Pen', 10)
+        self.client.force_authenticate(self.customer)
+
+    def test_number_is_allocated_after_stock_reservation(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/v1/orders/', {
+                'shipping_address': '1 Test Street',
+                'billing_address': '1 Test Street',
+                'phone_number': '+254700000000',
+                'items': [{'product_id': str(self.pen.id), 'quantity': 2}]
+            }, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        order = Order.objects.get()
+        self.assertRegex(order.order_number, r'^ORD-\d{8}-0001$')
+        self.assertEqual(order.snapshot['order_number'], order.order_number)
+
+        statements = [query['sql'] for query in queries.captured_queries]
+        counter = next(i for i, sql in enumerate(statements) if 'order_number_counters' in sql)
+        stock = max(i for i, sql in enumerate(statements) if sql.startswith('UPDATE "products"'))
+        self.assertGreater(counter, stock)
+
+
+class ConcurrentOrderNumberTests(TransactionTestCase):
+    """Order numbers stay unique and gap-free under parallel checkouts"""
+    ORDER_COUNT = 2000
+    THREAD_COUNT = 16
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('In-memory SQLite cannot serve concurrent writers')
+        self.customer = Customer.objects.create_user(
+            email='rush@example.com', password='secret', first_name='Flash', last_name='Sale'
+        )
+
+    def test_parallel_order_creation(self):
+        start = threading.Barrier(self.THREAD_COUNT)
+        per_thread = self.ORDER_COUNT // self.THREAD_COUNT
+
+        def worker():
+            try:
+                start.wait()
+                return [create_order(self.customer).order_number for _ in range(per_thread)]
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.THREAD_COUNT) as executor:
+            futures = [executor.submit(worker) for _ in range(self.THREAD_COUNT)]
+            numbers = [number for future in futures for number in future.result()]
+
+        total = per_thread * self.THREAD_COUNT
+        self.assertEqual(len(numbers), total)
+        self.assertEqual(len(set(numbers)), total)
+        self.assertEqual(Order.objects.count(), total)
+
+        suffixes = sorted(int(number.rsplit('-', 1)[-1]) for number in numbers)
+        self.assertEqual(suffixes, list(range(1, total + 1)))
+
+
+class StockReservationTests(TestCase):
+    """Tests for atomic stock reservation on orders"""
+
+    def setUp(self):
+        self.customer = Customer.objects.create_user(
+            email='stock@example.com', password='secret', first_name='Stock', last_name='Test'
+        )
+        self.pen = create_product('Pen', 10)
+        self.ink = create_product('Ink', 1)
+
+    def test_reserve_and_release(self):
+        order = create_order_with_items(self.customer, (self.pen, 3), (self.ink, 1))
+        order.reserve_stock()
+        order.reserve_stock()
+
+        self.pen.refresh_from_db()
+        self.ink.refresh_from_db()
+        self.assertEqual((self.pen.stock_quantity, self.ink.stock_quantity), (7, 0))
+
+        order.release_stock()
+        order.release_stock()
+
+        self.pen.refresh_from_db()
+        self.ink.refresh_from_db()
+        self.assertEqual((self.pen.stock_quantity, self.ink.stock_quantity), (10, 1))
+
+    def test_short_item_reserves_nothing(self):
+        order = create_order_with_items(self.customer, (self.pen, 3), (self.ink, 2))
+
+        with self.assertRaises(InsufficientStock) as raised:
+            order.reserve_stock()
+
+        self.assertEqual(raised.exception.shortages[0]['product_id'], str(self.ink.pk))
+        self.pen.refresh_from_db()
+        self.assertEqual(self.pen.stock_quantity, 10)
+        self.assertFalse(Order.objects.get(pk=order.pk).stock_reserved)
+
+    def login_admin(self):
+        self.client.force_login(Customer.objects.create_user(
+            email='stock-admin@example.com', password='secret', first_name='Stock', last_name='Admin', is_staff=True
+        ))
+
+    def test_status_changes_reserve_and_release(self):
+        self.login_admin()
+
+        for change in ('update_status', 'partial_update'):
+            order = create_order_with_items(self.customer, (self.pen, 3))
+            if change == 'update_status':
+                send = lambda new_status: self.client.post(
+                    f'/api/v1/orders/{order.pk}/update_status/', {'status': new_status}, content_type='application/json'
+                )
+            else:
+                send = lambda new_status: self.client.patch(
+                    f'/api/v1/orders/{order.pk}/', {'status': new_status}, content_type='application/json'
+                )
+
+            self.assertEqual(send('confirmed').status_code, 200)
+            self.pen.refresh_from_db()
+            self.assertEqual(self.pen.stock_quantity, 7)
+
+            self.assertEqual(send('cancelled').status_code, 200)
+            self.pen.refresh_from_db()
+            self.assertEqual(self.pen.stock_quantity, 10)
+            self.assertFalse(Order.objects.get(pk=order.pk).stock_reserved)
+
+    def test_confirming_short_order_is_rejected(self):
+        self.login_admin()
+        order = create_order_with_items(self.customer, (self.ink, 2))
+
+        response = self.client.patch(
+            f'/api/v1/orders/{order.pk}/', {'status': 'confirmed'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Order.objects.get(pk=order.pk).status, 'pending')
+
+
+class OrderSnapshotTests(TestCase):
+    """Tests for the denormalized order snapshot"""
+
+    def setUp(self):
+        self.customer = Customer.objects.create_user(
+            email='snap@example.com', password='secret', first_name='Snap', last_name='Shot'
+        )
+        self.pen = create_product('Pen', 10)
+
+    def test_snapshot_follows_order_and_items(self):
+        order = create_order_with_items(self.customer, (self.pen, 2))
+        order.status = 'confirmed'
+        order.save()
+
+        snapshot = Order.objects.get(pk=order.pk).snapshot
+        self.assertEqual(snapshot['status'], 'confirmed')
+        self.assertEqual(snapshot['customer_name'], 'Snap Shot')
+        self.assertEqual(snapshot['items_count'], 1)
+        self.assertEqual(snapshot['items'][0]['quantity'], 2)
+        self.assertEqual(snapshot['items'][0]['subtotal'], '10.00')
+
+    def test_item_names_are_kept_as_purchased(self):
+        order = create_order_with_items(self.customer, (self.pen, 1))
+        self.pen.name = 'Fountain Pen'
+        self.pen.save()
+
+        item = order.items.get()
+        item.quantity = 3
+        item.save()
+
+        entry = Order.objects.get(pk=order.pk).snapshot['items'][0]
+        self.assertEqual((entry['product_name'], entry['quantity']), ('Pen', 3))
+
+    def test_save_without_snapshot_changes_skips_the_refresh(self):
+        order = create_order_with_items(self.customer, (self.pen, 1))
+        with self.assertNumQueries(1):
+            order.save()
+        with self.assertNumQueries(1):
+            order.is_paid = True
+            order.save(update_fields=['stock_reserved'])
+
+    def test_orders_without_snapshot_are_built_on_read(self):
+        orders = [create_order_with_items(self.customer, (self.pen, 1)) for _ in range(3)]
+        Order.objects.update(snapshot={})
+        self.client.force_login(self.customer)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v1/orders/')
+        self.assertEqual(response.status_code, 200)
+        # Session, user, count, page, reload of the missing orders, items
+        self.assertLessEqual(len(queries), 6)
+        self.assertFalse(any(query['sql'].startswith('UPDATE') for query in queries.captured_queries))
+
+        numbers = {order['order_number'] for order in response.json()['results']}
+        self.assertEqual(numbers, {order.order_number for order in orders})
+        self.assertFalse(Order.objects.exclude(snapshot={}).exists())
+
+
+class ConcurrentStockReservationTests(TransactionTestCase):
+    """Parallel orders for the same product never oversell"""
+    ORDER_COUNT = 200
+    THREAD_COUNT = 16
+    STOCK = 50
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('In-memory SQLite cannot serve concurrent writers')
+        customer = Customer.objects.create_user(
+            email='flash@example.com', password='secret', first_name='Flash', last_name='Sale'
+        )
+        self.product = create_product('Limited Edition', self.STOCK)
+        self.orders = [
+            create_order_with_items(customer, (self.product, 1)) for _ in range(self.ORDER_COUNT)
+        ]
+
+    def test_parallel_reservations(self):
+        start = threading.Barrier(self.THREAD_COUNT)
+
+        def worker(orders):
+            try:
+                start.wait()
+                reserved = 0
+                for order in orders:
+                    try:
+                        order.reserve_stock()
+                        reserved += 1
+                    except InsufficientStock:
+                        pass
+                return reserved
+            finally:
+                connection.close()
+
+        chunks = [self.orders[i::self.THREAD_COUNT] for i in range(self.THREAD_COUNT)]
+        with ThreadPoolExecutor(max_workers=self.THREAD_COUNT) as executor:
+            reserved = sum(executor.map(worker, chunks))
+
+        self.product.refresh_from_db()
+        self.assertEqual(reserved, self.STOCK)
+        self.assertEqual(self.product.stock_quantity, 0)
+        self.assertEqual(Order.objects.filter(stock_reserved=True).count(), self.STOCK)
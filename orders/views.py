@@ -1,10 +1,15 @@
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db import transaction
 from django.db.models import Sum, Count
 from django.shortcuts import get_object_or_404
+from orderflow.fieldsets import trim_fields
+from orderflow.pagination import KeysetPagination
+from products.stock import InsufficientStock
 from .models import Order, OrderItem
 from .serializers import (
     OrderSerializer, OrderCreateSerializer, OrderStatusUpdateSerializer,
@@ -16,6 +21,7 @@ class OrderViewSet(viewsets.ModelViewSet):
     """ViewSet for Order model with order management"""
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
+    pagination_class = KeysetPagination
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'is_paid']
@@ -23,11 +29,18 @@ class OrderViewSet(viewsets.ModelViewSet):
     ordering_fields = ['created_at', 'total_amount', 'status']
     ordering = ['-created_at']
     
+    # Actions rendered from the stored order snapshots
+    snapshot_actions = ['list', 'retrieve', 'my_orders', 'pending']
+    
     def get_queryset(self):
         """Return orders based on user permissions"""
-        if self.request.user.is_staff:
-            return Order.objects.select_related('customer').prefetch_related('items')
-        return Order.objects.filter(customer=self.request.user).select_related('customer').prefetch_related('items')
+        queryset = Order.objects.all()
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(customer=self.request.user)
+        if self.action in self.snapshot_actions:
+            # Pagination keys plus the snapshot; nothing else is read
+            return queryset.only('id', 'created_at', 'snapshot')
+        return queryset.select_related('customer').prefetch_related('items')
     
     def get_serializer_class(self):
         """Return appropriate serializer based on action"""
@@ -43,15 +56,60 @@ class OrderViewSet(viewsets.ModelViewSet):
             return [IsAdminUser()]
         return [IsAuthenticated()]
     
+    def render_snapshot(self, order):
+        """Return an order's snapshot trimmed to the request's ?fields= / ?exclude="""
+        return trim_fields(order.get_snapshot(), self.request)
+    
+    def fill_missing_snapshots(self, orders):
+        """
+        Build, without storing, the snapshots of orders that predate them
+        
+        The orders are loaded with only their snapshot, so the missing ones
+        are reloaded in full with one query (plus prefetches) rather than
+        field by field. Run rebuild_order_snapshots --missing to backfill.
+        """
+        missing = [order.pk for order in orders if not order.snapshot]
+        if not missing:
+            return
+        
+        sources = Order.objects.with_snapshot_sources().in_bulk(missing)
+        for order in orders:
+            if order.pk in sources:
+                source = sources[order.pk]
+                order.snapshot = source.build_snapshot(source.items.all())
+    
+    def snapshot_response(self, queryset):
+        """Return a (paginated) list of orders straight from their snapshots"""
+        page = self.paginate_queryset(queryset)
+        orders = list(page if page is not None else queryset)
+        self.fill_missing_snapshots(orders)
+        
+        data = [self.render_snapshot(order) for order in orders]
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+    
+    def list(self, request, *args, **kwargs):
+        """List orders from their snapshots"""
+        return self.snapshot_response(self.filter_queryset(self.get_queryset()))
+    
+    def retrieve(self, request, *args, **kwargs):
+        """Return an order from its snapshot"""
+        order = self.get_object()
+        self.fill_missing_snapshots([order])
+        return Response(self.render_snapshot(order))
+    
+    def perform_update(self, serializer):
+        """Save a status change, reporting a failed stock reservation as a 400"""
+        try:
+            serializer.save()
+        except InsufficientStock as e:
+            raise ValidationError({'error': str(e)})
+    
     def perform_create(self, serializer):
         """Create order with additional logic"""
-        order = serializer.save()
-        
-        # Update stock quantities
-        for item in order.items.all():
-            product = item.product
-            product.stock_quantity = max(0, product.stock_quantity - item.quantity)
-            product.save()
+        # Stock is reserved atomically by OrderCreateSerializer.create
+        serializer.save()
         
         # TODO: Send SMS and email notifications
         # This will be implemented in Phase 3
@@ -63,14 +121,13 @@ class OrderViewSet(viewsets.ModelViewSet):
         serializer = OrderStatusUpdateSerializer(order, data=request.data, partial=True)
         
         if serializer.is_valid():
-            old_status = order.status
-            serializer.save()
-            
-            # If status changed to confirmed, update stock
-            if old_status != 'confirmed' and order.status == 'confirmed':
-                order.update_stock()
+            try:
+                # Confirming reserves stock and cancelling releases it, atomically with the save
+                serializer.save()
+            except InsufficientStock as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
             
-            return Response(OrderSerializer(order).data)
+            return Response(self.render_snapshot(order))
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     @action(detail=True, methods=['post'])
@@ -84,28 +141,20 @@ class OrderViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        order.status = 'cancelled'
-        order.save()
-        
-        # Restore stock quantities
-        for item in order.items.all():
-            product = item.product
-            product.stock_quantity += item.quantity
-            product.save()
+        with transaction.atomic():
+            order.status = 'cancelled'
+            order.save()
+            
+            # Restore stock quantities
+            order.release_stock()
         
-        return Response(OrderSerializer(order).data)
+        return Response(self.render_snapshot(order))
     
     @action(detail=False, methods=['get'])
     def my_orders(self, request):
         """Get current user's orders"""
         orders = self.get_queryset().filter(customer=request.user)
-        page = self.paginate_queryset(orders)
-        if page is not None:
-            serializer = OrderSerializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        
-        serializer = OrderSerializer(orders, many=True)
-        return Response(serializer.data)
+        return self.snapshot_response(orders)
     
     @action(detail=False, methods=['get'])
     def pending(self, request):
@@ -117,13 +166,7 @@ class OrderViewSet(viewsets.ModelViewSet):
             )
         
         pending_orders = self.get_queryset().filter(status='pending')
-        page = self.paginate_queryset(pending_orders)
-        if page is not None:
-            serializer = OrderSerializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        
-        serializer = OrderSerializer(pending_orders, many=True)
-        return Response(serializer.data)
+        return self.snapshot_response(pending_orders)
     
     @action(detail=False, methods=['get'])
     def statistics(self, request):
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, Product
+from .models import Category, Product, CategoryPriceStats
 
 
 @admin.register(Category)
@@ -57,3 +57,12 @@ class ProductAdmin(admin.ModelAdmin):
         if not obj.sku:
             obj.sku = f"SKU-{str(obj.id)[:8].upper()}"
         super().save_model(request, obj, form, change)
+
+
+@admin.register(CategoryPriceStats)
+class CategoryPriceStatsAdmin(admin.ModelAdmin):
+    """Read-only admin view of category price rollups"""
+    list_display = ['category', 'product_count', 'average_price', 'min_price', 'max_price', 'updated_at']
+    search_fields = ['category__name']
+    ordering = ['category__name']
+    readonly_fields = ['category', 'product_count', 'price_sum', 'min_price', 'max_price', 'updated_at']
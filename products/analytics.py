@@ -0,0 +1,127 @@
+import numpy as np
+from .cache import cache_get, cache_set
+from .models import Category, Product, split_path
+
+PRICE_DISTRIBUTION_CACHE_KEY = 'products:price_distribution:{bins}'
+PRICE_DISTRIBUTION_TIMEOUT = 60
+STREAM_CHUNK_SIZE = 5000
+
+
+def _load_prices():
+    """Stream (category_id, price) pairs of active products into a NumPy array"""
+    rows = Product.objects.filter(status='active').values_list(
+        'category_id', 'price'
+    ).order_by().iterator(chunk_size=STREAM_CHUNK_SIZE)
+    return np.fromiter(rows, dtype=[('category', 'i8'), ('price', 'f8')])
+
+
+def compute_price_distribution(bins=10):
+    """
+    Compute price percentiles and histograms for every category subtree
+
+    Every product is counted once for its own category and once for each
+    ancestor, then all groups are sorted together so percentiles and
+    histograms come out of a single vectorized pass.
+
+    Args:
+        bins (int): Number of histogram bins per category
+
+    Returns:
+        list: Distribution stats per category with active products
+    """
+    categories = list(Category.objects.values_list('id', 'name', 'slug', 'path'))
+    if not categories:
+        return []
+
+    index = {pk: i for i, (pk, _, _, _) in enumerate(categories)}
+    category_ids = np.fromiter((pk for pk, _, _, _ in categories), dtype=np.int64, count=len(categories))
+    id_order = np.argsort(category_ids)
+    sorted_ids = category_ids[id_order]
+    lineages = [[index[pk] for pk in split_path(path)] for _, _, _, path in categories]
+    lineage_len = np.array([len(lineage) for lineage in lineages], dtype=np.int64)
+    lineage_start = np.cumsum(lineage_len) - lineage_len
+    lineage_flat = np.fromiter(
+        (i for lineage in lineages for i in lineage), dtype=np.int64, count=int(lineage_len.sum())
+    )
+
+    # Map category ids to their row in `categories` with one vectorized binary search;
+    # products of categories created after the categories were read are left out
+    data = _load_prices()
+    positions = np.minimum(np.searchsorted(sorted_ids, data['category']), len(sorted_ids) - 1)
+    known = sorted_ids[positions] == data['category']
+    data = data[known]
+    if not len(data):
+        return []
+
+    # Expand each product into one (group, price) row per ancestor-or-self
+    product_cat = id_order[positions[known]]
+    lengths = lineage_len[product_cat]
+    repeat_idx = np.repeat(np.arange(len(data)), lengths)
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    groups = lineage_flat[lineage_start[product_cat][repeat_idx] + offsets]
+    prices = data['price'][repeat_idx]
+
+    order = np.lexsort((prices, groups))
+    groups = groups[order]
+    prices = prices[order]
+
+    group_count = len(categories)
+    counts = np.bincount(groups, minlength=group_count)
+    starts = np.cumsum(counts) - counts
+    present = counts > 0
+    last = np.where(present, starts + counts - 1, 0)
+    mins = np.where(present, prices[np.minimum(starts, len(prices) - 1)], 0)
+    maxs = np.where(present, prices[last], 0)
+
+    def percentile(q):
+        position = starts + q * np.maximum(counts - 1, 0)
+        lower = np.floor(position).astype(np.int64)
+        upper = np.ceil(position).astype(np.int64)
+        lower = np.minimum(lower, len(prices) - 1)
+        upper = np.minimum(upper, len(prices) - 1)
+        return prices[lower] + (prices[upper] - prices[lower]) * (position - lower)
+
+    p10, median, p90 = percentile(0.1), percentile(0.5), percentile(0.9)
+
+    # Histogram bins span each subtree's own [min, max] range
+    spans = maxs - mins
+    element_span = spans[groups]
+    relative = np.divide(
+        prices - mins[groups], element_span,
+        out=np.zeros_like(prices), where=element_span > 0
+    )
+    bin_idx = np.minimum((relative * bins).astype(np.int64), bins - 1)
+    histograms = np.bincount(
+        groups * bins + bin_idx, minlength=group_count * bins
+    ).reshape(group_count, bins)
+
+    result = []
+    for i in np.flatnonzero(present):
+        pk, name, slug, _ = categories[i]
+        edges = mins[i] + spans[i] * np.arange(bins + 1) / bins
+        result.append({
+            'category_id': pk,
+            'category_name': name,
+            'category_slug': slug,
+            'product_count': int(counts[i]),
+            'min_price': round(float(mins[i]), 2),
+            'p10_price': round(float(p10[i]), 2),
+            'median_price': round(float(median[i]), 2),
+            'p90_price': round(float(p90[i]), 2),
+            'max_price': round(float(maxs[i]), 2),
+            'histogram': {
+                'bin_edges': [round(float(edge), 2) for edge in edges],
+                'counts': histograms[i].tolist(),
+            },
+        })
+    return result
+
+
+def get_price_distribution(bins=10):
+    """Get per-subtree price distribution, cached for a short TTL"""
+    key = PRICE_DISTRIBUTION_CACHE_KEY.format(bins=bins)
+    result = cache_get(key)
+    if result is None:
+        result = compute_price_distribution(bins)
+        cache_set(key, result, PRICE_DISTRIBUTION_TIMEOUT)
+    return result
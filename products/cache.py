@@ -0,0 +1,198 @@
+import hashlib
+import threading
+import time
+import uuid
+from collections import defaultdict, namedtuple
+from django.core.cache import cache
+from rest_framework.renderers import JSONRenderer
+from .models import Category, split_path
+import logging
+
+logger = logging.getLogger(__name__)
+
+CATEGORY_TREE_CACHE_KEY = 'products:category_tree'
+CATEGORY_TREE_TIMEOUT = 60 * 60 * 24
+
+CATEGORY_VERSION_CACHE_KEY = 'products:category_version'
+# How often a worker checks the shared version key before trusting its local map
+CATEGORY_MAP_CHECK_INTERVAL = 1.0
+
+CategoryInfo = namedtuple('CategoryInfo', ['name', 'path', 'full_path', 'ancestor_ids'])
+
+
+def cache_get(key):
+    """Read a cache entry, treating an unreachable cache as a miss"""
+    try:
+        return cache.get(key)
+    except Exception as e:
+        logger.error(f"Failed to read cache key {key}: {e}")
+        return None
+
+
+def cache_set(key, value, timeout):
+    """Store a cache entry, logging instead of raising if the cache is unreachable"""
+    try:
+        cache.set(key, value, timeout)
+    except Exception as e:
+        logger.error(f"Failed to write cache key {key}: {e}")
+
+
+def build_category_tree():
+    """
+    Build the active category tree from a single flat query
+
+    Returns:
+        list: Serialized root categories with nested children
+    """
+    from .serializers import CategoryTreeSerializer
+
+    categories = Category.objects.filter(is_active=True).order_by('name')
+    children_map = defaultdict(list)
+    for category in categories:
+        children_map[category.parent_id].append(category)
+
+    # Roots are the children of "no parent"; inactive parents hide their subtree
+    roots = children_map.get(None, [])
+    serializer = CategoryTreeSerializer(
+        roots, many=True, context={'children_map': children_map}
+    )
+    return serializer.data
+
+
+def get_category_tree():
+    """
+    Get the pre-rendered category tree JSON and its ETag
+
+    The tree is cached under the current category version, so a tree built
+    while an invalidation lands is stored under the old version and never
+    served again.
+
+    Returns:
+        tuple: (JSON bytes, quoted ETag string)
+    """
+    version = get_category_version()
+    cache_key = f"{CATEGORY_TREE_CACHE_KEY}:{version}"
+    if version is not None:
+        try:
+            cached = cache.get(cache_key)
+        except Exception as e:
+            logger.error(f"Failed to read category tree cache: {e}")
+            cached = None
+        if cached is not None:
+            return cached
+
+    content = JSONRenderer().render(build_category_tree())
+    etag = f'"{hashlib.md5(content).hexdigest()}"'
+    if version is not None:
+        try:
+            cache.set(cache_key, (content, etag), CATEGORY_TREE_TIMEOUT)
+        except Exception as e:
+            logger.error(f"Failed to cache category tree: {e}")
+    return content, etag
+
+
+def invalidate_category_tree():
+    """Drop the cached category tree so the next request rebuilds it"""
+    try:
+        cache.delete(f"{CATEGORY_TREE_CACHE_KEY}:{cache.get(CATEGORY_VERSION_CACHE_KEY)}")
+    except Exception as e:
+        logger.error(f"Failed to invalidate category tree cache: {e}")
+
+
+class CategoryMap:
+    """
+    Process-local id -> CategoryInfo map of the whole category tree
+    
+    The tree is small and rarely changes, so each worker keeps a copy and
+    reloads it when the version key in the shared cache moves on.
+    """
+    
+    def __init__(self):
+        self._categories = None
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+    
+    def _shared_version(self):
+        """Read the shared version, creating one if the key is missing"""
+        try:
+            version = cache.get(CATEGORY_VERSION_CACHE_KEY)
+            if version is None:
+                version = uuid.uuid4().hex
+                if not cache.add(CATEGORY_VERSION_CACHE_KEY, version, None):
+                    version = cache.get(CATEGORY_VERSION_CACHE_KEY)
+            return version
+        except Exception as e:
+            logger.error(f"Failed to read category map version: {e}")
+            return None
+    
+    def _load(self):
+        """Build the map from a single query"""
+        rows = list(Category.objects.values_list('id', 'name', 'path'))
+        names = {pk: name for pk, name, _ in rows}
+        categories = {}
+        for pk, name, path in rows:
+            ids = split_path(path)
+            full_path = ' > '.join(names[i] for i in ids if i in names)
+            categories[pk] = CategoryInfo(name, path, full_path or name, ids[:-1])
+        return categories
+    
+    def _refresh(self, force=False):
+        """Return the local map, reloading it if the shared version moved on"""
+        categories = self._categories
+        now = time.monotonic()
+        if not force and categories is not None and now - self._checked_at < CATEGORY_MAP_CHECK_INTERVAL:
+            return categories
+        
+        with self._lock:
+            version = self._shared_version()
+            if force or self._categories is None or version is None or version != self._version:
+                self._categories = self._load()
+                self._version = version
+            self._checked_at = now
+            return self._categories
+    
+    def get(self, category_id):
+        """
+        Get cached details for a category
+        
+        Args:
+            category_id (int): Category primary key
+            
+        Returns:
+            CategoryInfo: Name, materialized path, full path and ancestor ids, or None
+        """
+        info = self._refresh().get(category_id)
+        if info is None:
+            # Category newer than our copy; reload once
+            info = self._refresh(force=True).get(category_id)
+        return info
+    
+    def clear(self):
+        """Drop the local copy so the next lookup reloads it"""
+        with self._lock:
+            self._categories = None
+            self._version = None
+
+
+category_map = CategoryMap()
+
+
+def get_category_version():
+    """Return the shared version that moves on whenever any category changes"""
+    return category_map._shared_version()
+
+
+def invalidate_category_map():
+    """Bump the shared version so every worker reloads its category map"""
+    category_map.clear()
+    try:
+        cache.set(CATEGORY_VERSION_CACHE_KEY, uuid.uuid4().hex, None)
+    except Exception as e:
+        logger.error(f"Failed to bump category map version: {e}")
+
+
+def invalidate_category_caches():
+    """Invalidate every cache derived from the category table"""
+    invalidate_category_tree()
+    invalidate_category_map()
@@ -0,0 +1,98 @@
+from collections import Counter
+from decimal import Decimal
+from django.db.models import Case, Count, IntegerField, Value, When
+from .cache import category_map
+from .models import Product
+
+# Upper bounds of the price bands; the last band is open-ended
+PRICE_BAND_LIMITS = [Decimal(limit) for limit in ('10', '25', '50', '100', '250', '500')]
+
+
+def price_bands():
+    """Return (index, label, min, max) for every price band"""
+    bands = []
+    lower = Decimal('0')
+    for index, upper in enumerate(PRICE_BAND_LIMITS):
+        bands.append((index, f"{lower:.0f}-{upper:.0f}", lower, upper))
+        lower = upper
+    bands.append((len(PRICE_BAND_LIMITS), f"{lower:.0f}+", lower, None))
+    return bands
+
+
+def price_band_expression():
+    """SQL expression mapping a product's price to its band index"""
+    return Case(
+        *[When(price__lt=upper, then=Value(index)) for index, upper in enumerate(PRICE_BAND_LIMITS)],
+        default=Value(len(PRICE_BAND_LIMITS)),
+        output_field=IntegerField()
+    )
+
+
+def compute_facets(queryset, statuses=None):
+    """
+    Count products per category subtree, status and price band
+
+    All three facets come from one GROUP BY (category, status, band) query;
+    subtree counts are rolled up from the category paths in memory. The
+    status facet counts every row, so it shows what the other statuses
+    would hold, while the total, category and price facets only count the
+    statuses the list itself would show.
+
+    Args:
+        queryset: Filtered Product queryset, without the list's default status filter
+        statuses (set): Statuses counted in the total, category and price
+            facets; None counts every status
+
+    Returns:
+        dict: Total count and the category, status and price facets
+    """
+    rows = queryset.order_by().annotate(
+        price_band=price_band_expression()
+    ).values('category_id', 'status', 'price_band').annotate(count=Count('pk'))
+
+    category_counts = Counter()
+    status_counts = Counter()
+    band_counts = Counter()
+    total = 0
+    for row in rows:
+        count = row['count']
+        status_counts[row['status']] += count
+        if statuses is not None and row['status'] not in statuses:
+            continue
+        total += count
+        band_counts[row['price_band']] += count
+
+        info = category_map.get(row['category_id'])
+        for category_id in (info.ancestor_ids if info else []):
+            category_counts[category_id] += count
+        category_counts[row['category_id']] += count
+
+    categories = []
+    for category_id, count in category_counts.items():
+        info = category_map.get(category_id)
+        categories.append({
+            'id': category_id,
+            'name': info.name if info else '',
+            'parent': info.ancestor_ids[-1] if info and info.ancestor_ids else None,
+            'count': count
+        })
+    categories.sort(key=lambda item: (-item['count'], item['name']))
+
+    return {
+        'total': total,
+        'categories': categories,
+        'status': [
+            {'value': value, 'label': label, 'count': status_counts[value]}
+            for value, label in Product.PRODUCT_STATUS_CHOICES
+            if status_counts[value]
+        ],
+        'price': [
+            {
+                'label': label,
+                'min': str(lower),
+                'max': str(upper) if upper is not None else None,
+                'count': band_counts[index]
+            }
+            for index, label, lower, upper in price_bands()
+        ]
+    }
@@ -0,0 +1,87 @@
+import hashlib
+import io
+import posixpath
+from PIL import Image, ImageOps
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Variant name -> bounding box; images are shrunk to fit, never enlarged
+IMAGE_VARIANTS = {
+    'thumbnail': (150, 150),
+    'card': (400, 400),
+    'zoom': (1600, 1600),
+}
+
+# Output formats as (Pillow format, file extension, save options)
+IMAGE_FORMATS = (
+    ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    ('JPEG', 'jpeg', {'quality': 85, 'optimize': True, 'progressive': True}),
+)
+
+HASH_LENGTH = 16
+
+
+def variant_name(source_name, digest, variant, extension):
+    """Build the storage name of a variant next to its source image"""
+    folder = posixpath.dirname(source_name)
+    return posixpath.join(folder, 'variants', f"{digest}-{variant}.{extension}")
+
+
+def _prepare(image, file_format):
+    """Convert an image to a mode the output format can store"""
+    if file_format == 'JPEG':
+        if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            return background
+        return image.convert('RGB') if image.mode != 'RGB' else image
+
+    if image.mode not in ('RGB', 'RGBA'):
+        has_alpha = image.mode in ('LA', 'PA') or 'transparency' in image.info
+        return image.convert('RGBA' if has_alpha else 'RGB')
+    return image
+
+
+def generate_image_variants(image_field):
+    """
+    Render every size and format of an uploaded image into storage
+
+    Variant names are derived from a hash of the source bytes, so a file's
+    URL changes whenever its content does and it can be cached forever.
+    Variants that already exist in storage are not rendered again.
+
+    Args:
+        image_field: FieldFile of a Product or Category image
+
+    Returns:
+        dict: Source name plus width, height and per-format storage names per variant
+    """
+    source_name = image_field.name
+    with image_field.open('rb') as source:
+        data = source.read()
+
+    digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+    original = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+
+    variants = {'source': source_name}
+    for variant, size in IMAGE_VARIANTS.items():
+        image = original.copy()
+        image.thumbnail(size, Image.LANCZOS)
+        entry = {'width': image.width, 'height': image.height}
+
+        for file_format, extension, options in IMAGE_FORMATS:
+            name = variant_name(source_name, digest, variant, extension)
+            if not default_storage.exists(name):
+                buffer = io.BytesIO()
+                _prepare(image, file_format).save(buffer, file_format, **options)
+                name = default_storage.save(name, ContentFile(buffer.getvalue()))
+            entry[extension] = name
+
+        variants[variant] = entry
+
+    logger.info(f"Generated image variants for {source_name}")
+    return variants
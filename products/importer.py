@@ -0,0 +1,295 @@
+import csv
+import io
+import json
+import re
+import uuid
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils.text import slugify
+from .models import Category, Product, CategoryPriceStats, split_path
+import logging
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_FORMATS = ('csv', 'jsonl')
+MAX_PRICE = Decimal('99999999.99')
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 't'}
+FALSE_VALUES = {'0', 'false', 'no', 'n', 'f', ''}
+
+
+class ProductImporter:
+    """
+    Streaming bulk product importer for CSV and JSONL files
+
+    Rows are validated in memory and products are written with bulk_create
+    in batches. Slug and SKU collisions with the catalog are looked up once
+    per batch, so memory does not grow with the size of the catalog.
+    """
+
+    def __init__(self, batch_size=None):
+        self.batch_size = batch_size or getattr(settings, 'PRODUCT_IMPORT_BATCH_SIZE', 1000)
+        if self.batch_size < 1:
+            raise ValueError('batch_size must be a positive integer')
+        self.status_values = {value for value, _ in Product.PRODUCT_STATUS_CHOICES}
+
+        categories = list(Category.objects.values_list('id', 'slug', 'path'))
+        self.category_paths = {pk: path for pk, _, path in categories}
+        self.category_slugs = {slug: pk for pk, slug, _ in categories}
+
+        # SKUs given in the pending batch; earlier batches are already in the table
+        self.batch_skus = set()
+
+    def read_rows(self, stream, file_format):
+        """
+        Yield row dicts from a binary or text stream
+
+        Args:
+            stream: File-like object
+            file_format (str): 'csv' or 'jsonl'
+        """
+        if isinstance(stream.read(0), bytes):
+            stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+        if file_format == 'csv':
+            yield from csv.DictReader(stream)
+        else:
+            for line in stream:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    row = {'__error__': f'Invalid JSON: {e}'}
+                if not isinstance(row, dict):
+                    row = {'__error__': 'Each line must be a JSON object'}
+                yield row
+
+    @staticmethod
+    def base_slug(name):
+        """Return the slug a product name starts from"""
+        return slugify(name)[:190] or 'product'
+
+    def assign_slugs(self, products):
+        """Give products slugs that collide with no existing or pending product"""
+        bases = {self.base_slug(product.name) for product in products}
+        lookup = Q()
+        for base in bases:
+            lookup |= Q(slug=base) | Q(
+                slug__startswith=f'{base}-', slug__regex=rf'^{re.escape(base)}-[0-9]+$'
+            )
+        used = set(Product.objects.filter(lookup).values_list('slug', flat=True))
+
+        counters = {}
+        for product in products:
+            base = self.base_slug(product.name)
+            slug = base
+            counter = counters.get(base, 1)
+            while slug in used:
+                counter += 1
+                slug = f"{base}-{counter}"
+            counters[base] = counter
+            used.add(slug)
+            product.slug = slug
+
+    def assign_skus(self, products, taken):
+        """Generate unused SKUs, in the same format as Product.save, for products without one"""
+        pending = [product for product in products if not product.sku]
+        while pending:
+            for product in pending:
+                product.sku = f"SKU-{uuid.uuid4().hex[:8].upper()}"
+            taken |= set(
+                Product.objects.filter(sku__in=[p.sku for p in pending]).values_list('sku', flat=True)
+            )
+            retry = []
+            for product in pending:
+                if product.sku in taken:
+                    retry.append(product)
+                else:
+                    taken.add(product.sku)
+            pending = retry
+
+    def resolve_category(self, value):
+        """Resolve a category id or slug to a category id"""
+        value = str(value or '').strip()
+        if value.isdigit() and int(value) in self.category_paths:
+            return int(value)
+        return self.category_slugs.get(value)
+
+    def build_product(self, row):
+        """
+        Validate one row and build an unsaved Product
+
+        Returns:
+            tuple: (Product or None, dict of field errors)
+        """
+        if '__error__' in row:
+            return None, {'row': row['__error__']}
+
+        errors = {}
+
+        name = str(row.get('name') or '').strip()
+        if not name:
+            errors['name'] = 'This field is required.'
+        elif len(name) > 200:
+            errors['name'] = 'Ensure this field has no more than 200 characters.'
+
+        description = str(row.get('description') or '').strip()
+        if not description:
+            errors['description'] = 'This field is required.'
+
+        try:
+            price = Decimal(str(row.get('price', '')).strip()).quantize(Decimal('0.01'))
+            if price <= 0 or price > MAX_PRICE:
+                errors['price'] = 'Price must be greater than zero.'
+        except (InvalidOperation, ValueError):
+            price = None
+            errors['price'] = 'A valid number is required.'
+
+        category_id = self.resolve_category(row.get('category'))
+        if category_id is None:
+            errors['category'] = 'Category not found.'
+
+        try:
+            stock_quantity = int(str(row.get('stock_quantity') or 0).strip())
+            if stock_quantity < 0:
+                errors['stock_quantity'] = 'Stock quantity cannot be negative.'
+        except ValueError:
+            stock_quantity = 0
+            errors['stock_quantity'] = 'A valid integer is required.'
+
+        product_status = str(row.get('status') or 'active').strip().lower()
+        if product_status not in self.status_values:
+            errors['status'] = f'"{product_status}" is not a valid choice.'
+
+        featured = str(row.get('is_featured', '')).strip().lower()
+        if featured not in TRUE_VALUES | FALSE_VALUES:
+            errors['is_featured'] = 'Must be a valid boolean.'
+
+        sku = str(row.get('sku') or '').strip().upper()
+        if sku and len(sku) > 50:
+            errors['sku'] = 'Ensure this field has no more than 50 characters.'
+        elif sku and sku in self.batch_skus:
+            errors['sku'] = 'A product with this SKU already exists.'
+
+        if errors:
+            return None, errors
+
+        if sku:
+            self.batch_skus.add(sku)
+
+        product = Product(
+            name=name,
+            description=description,
+            price=price,
+            category_id=category_id,
+            sku=sku,
+            stock_quantity=stock_quantity,
+            status=product_status,
+            is_featured=featured in TRUE_VALUES
+        )
+        return product, {}
+
+    def prepare_batch(self, batch, report):
+        """
+        Drop rows whose SKU is already in the catalog and fill in slugs and SKUs
+
+        Returns:
+            list: (row number, Product) pairs ready to insert
+        """
+        skus = [product.sku for _, product in batch if product.sku]
+        taken = set(Product.objects.filter(sku__in=skus).values_list('sku', flat=True))
+        self.batch_skus = set()
+
+        ready = []
+        for row_number, product in batch:
+            if product.sku in taken:
+                report['failed'] += 1
+                report['errors'].append({
+                    'row': row_number,
+                    'errors': {'sku': 'A product with this SKU already exists.'}
+                })
+            else:
+                ready.append((row_number, product))
+
+        products = [product for _, product in ready]
+        self.assign_slugs(products)
+        self.assign_skus(products, taken | set(skus))
+        return ready
+
+    def flush(self, batch, report):
+        """Insert one batch and fold it into search vectors and price stats"""
+        if not batch:
+            return
+
+        batch = self.prepare_batch(batch, report)
+        products = [product for _, product in batch]
+        if not products:
+            return
+
+        try:
+            with transaction.atomic():
+                Product.objects.bulk_create(products, batch_size=self.batch_size)
+                Product.objects.filter(
+                    pk__in=[product.pk for product in products]
+                ).update_search_vector()
+                self.update_price_stats(products)
+            report['created'] += len(products)
+        except Exception as e:
+            logger.error(f"Bulk product import batch failed: {e}")
+            for row_number, _ in batch:
+                report['errors'].append({'row': row_number, 'errors': {'row': str(e)}})
+            report['failed'] += len(batch)
+
+    def update_price_stats(self, products):
+        """Apply a batch's active prices to the category rollups, one update per category"""
+        per_category = defaultdict(list)
+        for product in products:
+            if product.status == 'active':
+                per_category[product.category_id].append(product.price)
+
+        for category_id, prices in per_category.items():
+            CategoryPriceStats.objects.add(
+                split_path(self.category_paths[category_id]),
+                len(prices), sum(prices), min(prices), max(prices)
+            )
+
+    def run(self, stream, file_format):
+        """
+        Import products from a stream
+
+        Args:
+            stream: File-like object with CSV or JSONL content
+            file_format (str): 'csv' or 'jsonl'
+
+        Returns:
+            dict: Totals and a per-row error report
+        """
+        if file_format not in SUPPORTED_FORMATS:
+            raise ValueError(f"Unsupported format '{file_format}'. Use one of: {', '.join(SUPPORTED_FORMATS)}")
+
+        report = {'total': 0, 'created': 0, 'failed': 0, 'errors': []}
+        batch = []
+
+        # Row numbers are 1-based data rows (CSV header excluded)
+        for row_number, row in enumerate(self.read_rows(stream, file_format), start=1):
+            report['total'] += 1
+            product, errors = self.build_product(row)
+            if errors:
+                report['failed'] += 1
+                report['errors'].append({'row': row_number, 'errors': errors})
+                continue
+
+            batch.append((row_number, product))
+            if len(batch) >= self.batch_size:
+                self.flush(batch, report)
+                batch = []
+
+        self.flush(batch, report)
+        logger.info(
+            f"Product import finished: {report['created']} created, {report['failed']} failed"
+        )
+        return report
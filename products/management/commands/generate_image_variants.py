@@ -0,0 +1,78 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from django.core.management.base import BaseCommand
+from django.db import connection
+from products.models import Category, Product
+from products.tasks import process_image_variants, generate_image_variants_task
+
+
+def _process(model_name, pk):
+    """Process one image in a worker thread and release its DB connection"""
+    try:
+        return process_image_variants(model_name, pk)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Generate resized image variants for existing product and category images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            choices=['product', 'category', 'all'],
+            default='all',
+            help='Which images to process (default: all)'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate variants even where they already exist'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Number of images processed in parallel (default: 4)'
+        )
+        parser.add_argument(
+            '--async',
+            action='store_true',
+            dest='use_celery',
+            help='Queue one Celery task per image instead of processing locally'
+        )
+
+    def handle(self, *args, **options):
+        models = {'product': Product, 'category': Category}
+        if options['model'] != 'all':
+            models = {options['model']: models[options['model']]}
+
+        jobs = []
+        for model_name, model in models.items():
+            queryset = model.objects.exclude(image='').exclude(image__isnull=True)
+            if not options['force']:
+                queryset = queryset.filter(image_variants={})
+            jobs.extend(
+                (model_name, str(pk)) for pk in queryset.values_list('pk', flat=True).iterator()
+            )
+
+        if options['use_celery']:
+            for model_name, pk in jobs:
+                generate_image_variants_task.delay(model_name, pk)
+            self.stdout.write(self.style.SUCCESS(f'Queued {len(jobs)} images for processing'))
+            return
+
+        processed = failed = 0
+        with ThreadPoolExecutor(max_workers=max(options['workers'], 1)) as executor:
+            futures = {executor.submit(_process, model_name, pk): (model_name, pk) for model_name, pk in jobs}
+            for future in as_completed(futures):
+                model_name, pk = futures[future]
+                try:
+                    future.result()
+                    processed += 1
+                except Exception as e:
+                    failed += 1
+                    self.stdout.write(self.style.ERROR(f'Failed to process {model_name} {pk}: {e}'))
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Generated variants for {processed} images ({failed} failed)')
+        )
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from products.importer import ProductImporter, SUPPORTED_FORMATS
+
+
+class Command(BaseCommand):
+    help = 'Bulk import products from a CSV or JSONL file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=str, help='Path to the CSV or JSONL file')
+        parser.add_argument(
+            '--format',
+            type=str,
+            choices=SUPPORTED_FORMATS,
+            help='File format (default: taken from the file extension)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Rows per bulk insert (default: PRODUCT_IMPORT_BATCH_SIZE)'
+        )
+        parser.add_argument(
+            '--max-errors',
+            type=int,
+            default=50,
+            help='Number of row errors to print (default: 50)'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or path.rsplit('.', 1)[-1].lower()
+
+        if options['batch_size'] is not None and options['batch_size'] < 1:
+            raise CommandError('--batch-size must be a positive integer')
+
+        try:
+            with open(path, 'rb') as stream:
+                report = ProductImporter(batch_size=options['batch_size']).run(stream, file_format)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Failed to import products: {e}')
+
+        for error in report['errors'][:options['max_errors']]:
+            self.stdout.write(self.style.WARNING(f"Row {error['row']}: {error['errors']}"))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {report['created']} of {report['total']} products "
+                f"({report['failed']} failed)"
+            )
+        )
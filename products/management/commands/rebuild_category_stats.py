@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from products.models import CategoryPriceStats
+
+
+class Command(BaseCommand):
+    help = 'Recompute category price statistics from scratch'
+
+    def handle(self, *args, **options):
+        try:
+            count = CategoryPriceStats.objects.rebuild()
+
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'Successfully rebuilt price stats for {count} categories'
+                )
+            )
+
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'Failed to rebuild category price stats: {e}')
+            )
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.5 on 2026-10-17 04:02
+
+from django.db import migrations, models
+
+
+def populate_category_paths(apps, schema_editor):
+    """Build materialized paths for existing categories, roots first"""
+    Category = apps.get_model('products', 'Category')
+    parents = dict(Category.objects.values_list('id', 'parent_id'))
+    paths = {}
+
+    def build(pk):
+        if pk not in paths:
+            parent_id = parents[pk]
+            prefix = build(parent_id) if parent_id else ''
+            paths[pk] = f"{prefix}{pk}/"
+        return paths[pk]
+
+    categories = list(Category.objects.all())
+    for category in categories:
+        category.path = build(category.pk)
+        category.depth = category.path.count('/') - 1
+    Category.objects.bulk_update(categories, ['path', 'depth'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255),
+        ),
+        migrations.RunPython(populate_category_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.5 on 2026-10-17 04:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Sum
+
+
+def populate_price_stats(apps, schema_editor):
+    """Roll up active product prices into every ancestor category"""
+    Category = apps.get_model('products', 'Category')
+    Product = apps.get_model('products', 'Product')
+    CategoryPriceStats = apps.get_model('products', 'CategoryPriceStats')
+
+    paths = dict(Category.objects.values_list('id', 'path'))
+    direct = Product.objects.filter(status='active').values('category_id').annotate(
+        count=Count('id'), total=Sum('price'), low=Min('price'), high=Max('price')
+    ).order_by()
+
+    rollups = {}
+    for row in direct:
+        for pk in [int(pk) for pk in paths[row['category_id']].split('/') if pk]:
+            stats = rollups.setdefault(pk, CategoryPriceStats(
+                category_id=pk, min_price=row['low'], max_price=row['high']
+            ))
+            stats.product_count += row['count']
+            stats.price_sum += row['total']
+            stats.min_price = min(stats.min_price, row['low'])
+            stats.max_price = max(stats.max_price, row['high'])
+    CategoryPriceStats.objects.bulk_create(rollups.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_category_path'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryPriceStats',
+            fields=[
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='price_stats', serialize=False, to='products.category')),
+                ('product_count', models.IntegerField(default=0)),
+                ('price_sum', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('max_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Category Price Stats',
+                'verbose_name_plural': 'Category Price Stats',
+                'db_table': 'category_price_stats',
+            },
+        ),
+        migrations.RunPython(populate_price_stats, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,20 @@
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import connection, models, transaction
+from django.db.models import F, Q, Value, Count, Sum, Min, Max
+from django.db.models.functions import Coalesce, Concat, Greatest, Least, Substr, Upper
 from django.core.validators import MinValueValidator
 from django.utils.text import slugify
+from model_utils import FieldTracker
+from decimal import Decimal
 import uuid
 
 
+def split_path(path):
+    """Returns the category ids encoded in a materialized path, root first"""
+    return [int(pk) for pk in path.split(Category.PATH_SEPARATOR) if pk]
+
+
 class Category(models.Model):
     """
     Hierarchical category model for organizing products
@@ -20,15 +31,28 @@ class Category(models.Model):
         related_name='children'
     )
     image = models.ImageField(upload_to='categories/', blank=True, null=True)
+    # Resized image renditions, filled in asynchronously after the image changes
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     is_active = models.BooleanField(default=True)
+    # Materialized path of ancestor ids, e.g. "1/5/12/", kept in sync on save
+    path = models.CharField(max_length=255, blank=True, db_index=True, editable=False)
+    depth = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    PATH_SEPARATOR = '/'
+    
+    # Field tracker for detecting reparenting and image uploads
+    tracker = FieldTracker(fields=['parent', 'image'])
+    
     class Meta:
         db_table = 'categories'
         verbose_name = 'Category'
         verbose_name_plural = 'Categories'
         ordering = ['name']
+        indexes = [
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='categories_name_trgm'),
+        ]
     
     def __str__(self):
         return self.name
@@ -36,54 +60,117 @@ class Category(models.Model):
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+        if self.tracker.has_changed('image'):
+            self.image_variants = {}
+        
+        parent_changed = self.tracker.has_changed('parent')
+        if parent_changed and self.parent_id and self.path and self.parent.path.startswith(self.path):
+            raise ValueError("A category cannot be moved under itself or one of its descendants.")
+        
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if not self.path or parent_changed:
+                self._update_path()
+    
+    def _update_path(self):
+        """
+        Recompute the materialized path for this category and rewrite
+        the paths of its whole subtree in a single UPDATE
+        """
+        parent_path = self.parent.path if self.parent_id else ''
+        new_path = f"{parent_path}{self.pk}{self.PATH_SEPARATOR}"
+        new_depth = new_path.count(self.PATH_SEPARATOR) - 1
+        old_path, old_depth = self.path, self.depth
+        
+        if new_path == old_path:
+            return
+        
+        Category.objects.filter(pk=self.pk).update(path=new_path, depth=new_depth)
+        
+        if old_path:
+            # Reparent: shift every descendant onto the new prefix
+            Category.objects.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                path=Concat(Value(new_path), Substr('path', len(old_path) + 1)),
+                depth=F('depth') + (new_depth - old_depth)
+            )
+        
+        self.path = new_path
+        self.depth = new_depth
+        
+        if old_path:
+            CategoryPriceStats.objects.move_subtree(self, old_path)
+    
+    @property
+    def ancestor_ids(self):
+        """Returns ancestor ids from root to direct parent, read from the stored path"""
+        return split_path(self.path)[:-1]
     
     @property
     def full_path(self):
         """Returns the full category path from root to current category"""
-        path = [self.name]
-        parent = self.parent
-        while parent:
-            path.insert(0, parent.name)
-            parent = parent.parent
-        return ' > '.join(path)
+        return Category.get_full_paths([self])[self.id]
+    
+    @classmethod
+    def get_full_paths(cls, categories):
+        """
+        Resolve full paths for many categories with a single ancestor query
+        
+        Args:
+            categories (iterable): Category instances with stored paths
+            
+        Returns:
+            dict: Full path string keyed by category id
+        """
+        categories = list(categories)
+        ancestor_ids = {pk for category in categories for pk in category.ancestor_ids}
+        names = dict(
+            cls.objects.filter(pk__in=ancestor_ids).values_list('pk', 'name')
+        ) if ancestor_ids else {}
+        
+        full_paths = {}
+        for category in categories:
+            path = [names[pk] for pk in category.ancestor_ids if pk in names]
+            path.append(category.name)
+            full_paths[category.id] = ' > '.join(path)
+        return full_paths
     
     @property
     def level(self):
         """Returns the depth level of the category"""
-        level = 0
-        parent = self.parent
-        while parent:
-            level += 1
-            parent = parent.parent
-        return level
+        return self.depth
     
     @property
     def is_root(self):
         """Returns True if this is a root category"""
-        return self.parent is None
+        return self.parent_id is None
     
     @property
     def is_leaf(self):
         """Returns True if this category has no children"""
         return not self.children.exists()
     
-    def get_descendants(self):
+    def get_descendants(self, include_self=False):
         """Returns all descendant categories"""
-        descendants = []
-        for child in self.children.all():
-            descendants.append(child)
-            descendants.extend(child.get_descendants())
-        return descendants
+        queryset = Category.objects.filter(path__startswith=self.path)
+        if not include_self:
+            queryset = queryset.exclude(pk=self.pk)
+        return queryset
     
     def get_ancestors(self):
-        """Returns all ancestor categories"""
-        ancestors = []
-        parent = self.parent
-        while parent:
-            ancestors.append(parent)
-            parent = parent.parent
-        return ancestors
+        """Returns all ancestor categories, nearest first"""
+        return list(
+            Category.objects.filter(pk__in=self.ancestor_ids).order_by('-depth')
+        )
+
+
+class ProductQuerySet(models.QuerySet):
+    """QuerySet helpers for product search"""
+    
+    def update_search_vector(self):
+        """Recompute the stored full-text search vector for these products"""
+        if connection.vendor != 'postgresql':
+            return 0
+        return self.update(search_vector=PRODUCT_SEARCH_VECTOR)
 
 
 class Product(models.Model):
@@ -114,20 +201,33 @@ class Product(models.Model):
     sku = models.CharField(max_length=50, unique=True, blank=True)
     stock_quantity = models.PositiveIntegerField(default=0)
     image = models.ImageField(upload_to='products/', blank=True, null=True)
+    # Resized image renditions, filled in asynchronously after the image changes
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     status = models.CharField(
         max_length=20, 
         choices=PRODUCT_STATUS_CHOICES, 
         default='active'
     )
     is_featured = models.BooleanField(default=False)
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = ProductQuerySet.as_manager()
+    
     class Meta:
         db_table = 'products'
         verbose_name = 'Product'
         verbose_name_plural = 'Products'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='products_created_id_idx'),
+            models.Index(fields=['updated_at', 'id'], name='products_updated_id_idx'),
+            GinIndex(fields=['search_vector'], name='products_search_vector_gin'),
+            # Trigram indexes on UPPER(...) match the SQL Django emits for icontains
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='products_name_trgm'),
+            GinIndex(OpClass(Upper('sku'), name='gin_trgm_ops'), name='products_sku_trgm'),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.sku}"
@@ -137,7 +237,16 @@ class Product(models.Model):
             self.slug = slugify(self.name)
         if not self.sku:
             self.sku = f"SKU-{str(self.id)[:8].upper()}"
+        if self.tracker.has_changed('image'):
+            self.image_variants = {}
+        
+        reindex = self._state.adding or any(
+            self.tracker.has_changed(field) for field in ('name', 'description', 'sku')
+        )
         super().save(*args, **kwargs)
+        
+        if reindex:
+            Product.objects.filter(pk=self.pk).update_search_vector()
     
     @property
     def is_in_stock(self):
@@ -149,6 +258,9 @@ class Product(models.Model):
         """Returns the full category path for this product"""
         return self.category.full_path
     
+    # Field tracker for keeping category price stats, the search vector and image variants in sync
+    tracker = FieldTracker(fields=['category', 'price', 'status', 'name', 'description', 'sku', 'image'])
+    
     def get_average_price_for_category(self):
         """Returns the average price of all products in the same category"""
         from django.db.models import Avg
@@ -156,3 +268,159 @@ class Product(models.Model):
             category=self.category,
             status='active'
         ).aggregate(Avg('price'))['price__avg'] or 0
+
+
+# Weighted document for product full-text search: name and SKU rank above description
+PRODUCT_SEARCH_VECTOR = (
+    SearchVector('name', weight='A', config='english') +
+    SearchVector('sku', weight='A', config='simple') +
+    SearchVector('description', weight='B', config='english')
+)
+
+
+class CategoryPriceStatsManager(models.Manager):
+    """Incremental maintenance of subtree-inclusive price rollups"""
+    
+    def _rows(self, category_ids):
+        """Return stats rows for the given categories, creating missing ones"""
+        self.bulk_create(
+            [self.model(category_id=pk) for pk in category_ids],
+            ignore_conflicts=True
+        )
+        return self.filter(category_id__in=category_ids)
+    
+    def add(self, category_ids, count, total, min_price, max_price):
+        """Fold products into the rollups of the given categories"""
+        if not category_ids or not count:
+            return
+        
+        price_field = models.DecimalField(max_digits=10, decimal_places=2)
+        low = Value(min_price, output_field=price_field)
+        high = Value(max_price, output_field=price_field)
+        self._rows(category_ids).update(
+            product_count=F('product_count') + count,
+            price_sum=F('price_sum') + total,
+            min_price=Least(Coalesce('min_price', low), low),
+            max_price=Greatest(Coalesce('max_price', high), high)
+        )
+    
+    def remove(self, category_ids, count, total, min_price, max_price):
+        """Take products out of the rollups of the given categories"""
+        if not category_ids or not count:
+            return
+        
+        rows = self.filter(category_id__in=category_ids)
+        rows.update(
+            product_count=F('product_count') - count,
+            price_sum=F('price_sum') - total
+        )
+        
+        # Min/max cannot be decremented; re-aggregate only rows whose bound was removed
+        stale = rows.filter(
+            Q(product_count__lte=0) | Q(min_price__gte=min_price) | Q(max_price__lte=max_price)
+        ).select_related('category')
+        for stats in stale:
+            stats.recalculate()
+    
+    def add_product(self, category_path, price):
+        """Count one active product under every category on the path"""
+        price = Decimal(str(price))
+        self.add(split_path(category_path), 1, price, price, price)
+    
+    def remove_product(self, category_path, price):
+        """Stop counting one active product under every category on the path"""
+        price = Decimal(str(price))
+        self.remove(split_path(category_path), 1, price, price, price)
+    
+    def move_subtree(self, category, old_path):
+        """Shift a reparented subtree's totals from its old ancestors to its new ones"""
+        stats = self.filter(category=category, product_count__gt=0).first()
+        if stats is None:
+            return
+        
+        old_ancestors = set(split_path(old_path)[:-1])
+        new_ancestors = set(category.ancestor_ids)
+        totals = (
+            stats.product_count, stats.price_sum, stats.min_price, stats.max_price
+        )
+        self.remove(list(old_ancestors - new_ancestors), *totals)
+        self.add(list(new_ancestors - old_ancestors), *totals)
+    
+    @transaction.atomic
+    def rebuild(self):
+        """
+        Recompute every rollup from scratch
+        
+        Returns:
+            int: Number of categories with stats
+        """
+        rollups = {}
+        paths = dict(Category.objects.values_list('id', 'path'))
+        direct = Product.objects.filter(status='active').values('category_id').annotate(
+            count=Count('id'), total=Sum('price'), low=Min('price'), high=Max('price')
+        ).order_by()
+        
+        for row in direct:
+            for pk in split_path(paths[row['category_id']]):
+                stats = rollups.get(pk)
+                if stats is None:
+                    stats = rollups[pk] = self.model(
+                        category_id=pk, min_price=row['low'], max_price=row['high']
+                    )
+                stats.product_count += row['count']
+                stats.price_sum += row['total']
+                stats.min_price = min(stats.min_price, row['low'])
+                stats.max_price = max(stats.max_price, row['high'])
+        
+        self.all().delete()
+        self.bulk_create(rollups.values(), batch_size=1000)
+        return len(rollups)
+
+
+class CategoryPriceStats(models.Model):
+    """
+    Subtree-inclusive price statistics of active products per category
+    Maintained incrementally on product and category changes
+    """
+    category = models.OneToOneField(
+        Category,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='price_stats'
+    )
+    product_count = models.IntegerField(default=0)
+    price_sum = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    max_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    objects = CategoryPriceStatsManager()
+    
+    class Meta:
+        db_table = 'category_price_stats'
+        verbose_name = 'Category Price Stats'
+        verbose_name_plural = 'Category Price Stats'
+    
+    def __str__(self):
+        return f"{self.category.name} - {self.product_count} products"
+    
+    @property
+    def average_price(self):
+        """Returns the average price of active products in the subtree"""
+        if self.product_count <= 0:
+            return 0
+        return self.price_sum / self.product_count
+    
+    def recalculate(self):
+        """Re-aggregate this category's subtree from the products table"""
+        stats = Product.objects.filter(
+            category__path__startswith=self.category.path,
+            status='active'
+        ).aggregate(
+            count=Count('id'), total=Sum('price'), low=Min('price'), high=Max('price')
+        )
+        self.product_count = stats['count']
+        self.price_sum = stats['total'] or 0
+        self.min_price = stats['low']
+        self.max_price = stats['high']
+        self.save()
@@ -1,38 +1,84 @@
+from django.core.files.storage import default_storage
 from rest_framework import serializers
+from orderflow.fieldsets import SparseFieldsetMixin
 from .models import Category, Product
+from .cache import category_map
+from .images import IMAGE_FORMATS
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class ImageVariantsField(serializers.ReadOnlyField):
+    """Expose stored image variants as URLs, absolute when a request is available"""
+    
+    def to_representation(self, value):
+        request = self.context.get('request')
+        representation = {}
+        for variant, entry in (value or {}).items():
+            if not isinstance(entry, dict):
+                continue
+            urls = {'width': entry.get('width'), 'height': entry.get('height')}
+            for _, extension, _ in IMAGE_FORMATS:
+                name = entry.get(extension)
+                if name:
+                    url = default_storage.url(name)
+                    urls[extension] = request.build_absolute_uri(url) if request else url
+            representation[variant] = urls
+        return representation
+
+
+class CategoryListSerializer(serializers.ListSerializer):
+    """List serializer that resolves every row's full path with one query"""
+    
+    def to_representation(self, data):
+        iterable = list(data.all() if hasattr(data, 'all') else data)
+        if 'full_path' in self.child.fields:
+            self.context['full_paths'] = Category.get_full_paths(iterable)
+        return super().to_representation(iterable)
+
+
+class CategorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for Category model with hierarchical support"""
     parent_name = serializers.CharField(source='parent.name', read_only=True)
     children_count = serializers.SerializerMethodField()
-    level = serializers.ReadOnlyField()
-    full_path = serializers.ReadOnlyField()
+    level = serializers.IntegerField(source='depth', read_only=True)
+    full_path = serializers.SerializerMethodField()
+    image_variants = ImageVariantsField()
     
     class Meta:
         model = Category
         fields = [
             'id', 'name', 'slug', 'description', 'parent', 'parent_name',
-            'image', 'is_active', 'created_at', 'updated_at',
+            'image', 'image_variants', 'is_active', 'created_at', 'updated_at',
             'children_count', 'level', 'full_path'
         ]
         read_only_fields = ['slug', 'created_at', 'updated_at']
+        list_serializer_class = CategoryListSerializer
     
     def get_children_count(self, obj):
-        """Return the number of direct children"""
+        """Return the number of direct children, preferring the queryset annotation"""
+        if hasattr(obj, 'children_count'):
+            return obj.children_count
         return obj.children.count()
     
+    def get_full_path(self, obj):
+        """Return the full path, preferring the batch resolved by the list serializer"""
+        full_paths = self.context.get('full_paths') or {}
+        if obj.id in full_paths:
+            return full_paths[obj.id]
+        return obj.full_path
+    
     def validate_parent(self, value):
-        """Validate that parent is not the same as the category itself"""
+        """Validate that parent is not the category itself or one of its descendants"""
         if self.instance and value and self.instance.id == value.id:
             raise serializers.ValidationError("A category cannot be its own parent.")
+        if self.instance and value and value.path.startswith(self.instance.path):
+            raise serializers.ValidationError("A category cannot be moved under one of its descendants.")
         return value
 
 
 class CategoryTreeSerializer(serializers.ModelSerializer):
     """Serializer for displaying category hierarchy"""
     children = serializers.SerializerMethodField()
-    level = serializers.ReadOnlyField()
+    level = serializers.IntegerField(source='depth', read_only=True)
     
     class Meta:
         model = Category
@@ -40,25 +86,37 @@ class CategoryTreeSerializer(serializers.ModelSerializer):
     
     def get_children(self, obj):
         """Recursively get children categories"""
-        children = obj.children.filter(is_active=True)
+        children_map = self.context.get('children_map')
+        if children_map is not None:
+            children = children_map.get(obj.id, [])
+        else:
+            children = obj.children.filter(is_active=True)
         return CategoryTreeSerializer(children, many=True, context=self.context).data
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer for Product model"""
     category_name = serializers.CharField(source='category.name', read_only=True)
-    category_path = serializers.CharField(source='category.full_path', read_only=True)
+    category_path = serializers.SerializerMethodField()
     is_in_stock = serializers.ReadOnlyField()
+    image_variants = ImageVariantsField()
     
     class Meta:
         model = Product
         fields = [
             'id', 'name', 'slug', 'description', 'price', 'category', 'category_name',
-            'category_path', 'sku', 'stock_quantity', 'image', 'status',
+            'category_path', 'sku', 'stock_quantity', 'image', 'image_variants', 'status',
             'is_featured', 'created_at', 'updated_at', 'is_in_stock'
         ]
         read_only_fields = ['slug', 'sku', 'created_at', 'updated_at']
     
+    def get_category_path(self, obj):
+        """Return the category path from the process-local category map"""
+        info = category_map.get(obj.category_id)
+        if info is None:
+            return obj.category.full_path
+        return info.full_path
+    
     def validate_price(self, value):
         """Validate that price is positive"""
         if value <= 0:
@@ -72,6 +130,16 @@ class ProductSerializer(serializers.ModelSerializer):
         return value
 
 
+class ProductSearchSerializer(ProductSerializer):
+    """Serializer for ranked full-text search results"""
+    rank = serializers.FloatField(read_only=True)
+    name_highlight = serializers.CharField(read_only=True)
+    snippet = serializers.CharField(read_only=True)
+    
+    class Meta(ProductSerializer.Meta):
+        fields = ProductSerializer.Meta.fields + ['rank', 'name_highlight', 'snippet']
+
+
 class ProductUploadSerializer(serializers.ModelSerializer):
     """Serializer for product upload with file handling"""
     image = serializers.ImageField(required=False, allow_null=True)
@@ -102,3 +170,21 @@ class CategoryAveragePriceSerializer(serializers.Serializer):
     product_count = serializers.IntegerField()
     min_price = serializers.DecimalField(max_digits=10, decimal_places=2)
     max_price = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+
+class StockAdjustmentSerializer(serializers.Serializer):
+    """Serializer for one item of a bulk stock adjustment"""
+    id = serializers.UUIDField(required=False)
+    sku = serializers.CharField(required=False, max_length=50)
+    quantity = serializers.IntegerField(required=False, min_value=0)
+    delta = serializers.IntegerField(required=False)
+    
+    def validate(self, data):
+        """Require exactly one product key and exactly one kind of change"""
+        if ('id' in data) == ('sku' in data):
+            raise serializers.ValidationError("Provide either id or sku.")
+        
+        if ('quantity' in data) == ('delta' in data):
+            raise serializers.ValidationError("Provide either quantity or delta.")
+        
+        return data
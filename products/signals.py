@@ -0,0 +1,80 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Category, Product, CategoryPriceStats
+from .cache import invalidate_category_caches
+from .tasks import generate_image_variants_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _category_path(category_id):
+    """Look up a category's materialized path without loading the row"""
+    return Category.objects.filter(pk=category_id).values_list('path', flat=True).first()
+
+
+def _queue_image_variants(model_name, pk):
+    """Queue variant generation without failing the request if the broker is down"""
+    try:
+        generate_image_variants_task.delay(model_name, pk)
+    except Exception as e:
+        logger.error(f"Failed to queue image variants for {model_name} {pk}: {e}")
+
+
+def _schedule_image_variants(instance, model_name):
+    """Queue variant generation for a new or replaced image once the write is committed"""
+    if instance.image and instance.tracker.has_changed('image'):
+        pk = str(instance.pk)
+        transaction.on_commit(lambda: _queue_image_variants(model_name, pk))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def handle_category_change(sender, instance, **kwargs):
+    """Invalidate cached category data once the write is committed"""
+    transaction.on_commit(invalidate_category_caches)
+
+
+@receiver(post_save, sender=Category)
+def handle_category_image(sender, instance, **kwargs):
+    """Generate image variants after a category image upload"""
+    _schedule_image_variants(instance, 'category')
+
+
+@receiver(post_save, sender=Product)
+def handle_product_image(sender, instance, **kwargs):
+    """Generate image variants after a product image upload"""
+    _schedule_image_variants(instance, 'product')
+
+
+@receiver(post_save, sender=Product)
+def handle_product_price_stats(sender, instance, created, **kwargs):
+    """Keep category price rollups in sync with product price, category and status"""
+    tracker = instance.tracker
+    if not created and not any(tracker.has_changed(f) for f in ('category', 'price', 'status')):
+        return
+    
+    was_active = not created and tracker.previous('status') == 'active'
+    
+    with transaction.atomic():
+        # Add before removing so shared ancestors that get re-aggregated stay exact
+        if instance.status == 'active':
+            CategoryPriceStats.objects.add_product(
+                _category_path(instance.category_id), instance.price
+            )
+        if was_active:
+            old_path = _category_path(tracker.previous('category'))
+            if old_path:
+                CategoryPriceStats.objects.remove_product(old_path, tracker.previous('price'))
+
+
+@receiver(post_delete, sender=Product)
+def handle_product_delete_price_stats(sender, instance, **kwargs):
+    """Take a deleted active product out of the category price rollups"""
+    if instance.tracker.previous('status') != 'active':
+        return
+    
+    path = _category_path(instance.tracker.previous('category'))
+    if path:
+        CategoryPriceStats.objects.remove_product(path, instance.tracker.previous('price'))
@@ -0,0 +1,205 @@
+from django.db import models, transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+from .models import Product
+import logging
+
+logger = logging.getLogger(__name__)
+
+STOCK_UPDATE_BATCH_SIZE = 1000
+
+
+class InsufficientStock(Exception):
+    """Raised when a reservation cannot be met; no stock has been taken"""
+
+    def __init__(self, shortages):
+        self.shortages = shortages
+        super().__init__('; '.join(
+            f"Insufficient stock for product {item['product_id']}. "
+            f"Requested: {item['requested']}, available: {item['available']}"
+            for item in shortages
+        ))
+
+
+def _merge_quantities(items):
+    """Sum quantities per product from (product_id, quantity) pairs"""
+    quantities = {}
+    for product_id, quantity in items:
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+    return quantities
+
+
+def _quantity_case(quantities):
+    """CASE expression giving each product's quantity by primary key"""
+    return Case(
+        *[When(pk=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()],
+        output_field=models.PositiveIntegerField()
+    )
+
+
+def _lock_stock(product_ids):
+    """Lock product rows in primary key order and return their stock by id"""
+    # A fixed lock order means overlapping orders cannot deadlock
+    return {
+        str(pk): stock for pk, stock in
+        Product.objects.select_for_update().filter(pk__in=product_ids).order_by('pk').values_list(
+            'pk', 'stock_quantity'
+        )
+    }
+
+
+def reserve_stock(items):
+    """
+    Take stock for a set of items, all or nothing
+
+    The product rows are locked in primary key order, then all of them are
+    decremented by one conditional UPDATE (stock_quantity >= quantity), so
+    concurrent orders can never oversell or lose updates. The query count
+    does not depend on the number of items.
+
+    Args:
+        items (iterable): (product_id, quantity) pairs
+
+    Raises:
+        InsufficientStock: If any product is short; nothing is decremented
+    """
+    quantities = _merge_quantities(items)
+    if not quantities:
+        return
+
+    with transaction.atomic():
+        stock = _lock_stock(list(quantities))
+        short = [
+            product_id for product_id, quantity in quantities.items()
+            if stock.get(str(product_id), 0) < quantity
+        ]
+
+        if not short:
+            amount = _quantity_case(quantities)
+            updated = Product.objects.filter(
+                pk__in=list(quantities), stock_quantity__gte=amount
+            ).update(stock_quantity=F('stock_quantity') - amount, updated_at=timezone.now())
+            if updated == len(quantities):
+                return
+
+            # Only reachable on backends without row locks; raising rolls the update back
+            stock = _lock_stock(list(quantities))
+            short = [
+                product_id for product_id, quantity in quantities.items()
+                if stock.get(str(product_id), 0) < quantity
+            ] or list(quantities)
+
+        raise InsufficientStock([
+            {
+                'product_id': str(product_id),
+                'requested': quantities[product_id],
+                'available': stock.get(str(product_id), 0)
+            }
+            for product_id in short
+        ])
+
+
+def release_stock(items):
+    """
+    Put reserved stock back, e.g. when an order is cancelled
+
+    Args:
+        items (iterable): (product_id, quantity) pairs
+    """
+    quantities = _merge_quantities(items)
+    if not quantities:
+        return
+
+    with transaction.atomic():
+        _lock_stock(list(quantities))
+        Product.objects.filter(pk__in=list(quantities)).update(
+            stock_quantity=F('stock_quantity') + _quantity_case(quantities),
+            updated_at=timezone.now()
+        )
+
+
+def bulk_adjust_stock(adjustments):
+    """
+    Apply many stock changes with set-based UPDATEs in one transaction
+
+    The batch is all or nothing: if any item names an unknown product or
+    would take stock below zero, nothing is written and only the errors
+    are returned.
+
+    Args:
+        adjustments (list): Dicts with either 'id' or 'sku', and either an
+            absolute 'quantity' or a relative 'delta'
+
+    Returns:
+        dict: 'updated' rows that changed and per-item 'errors'
+    """
+    ids = {str(item['id']) for item in adjustments if item.get('id')}
+    skus = {item['sku'] for item in adjustments if item.get('sku')}
+
+    with transaction.atomic():
+        rows = Product.objects.select_for_update().filter(
+            Q(id__in=ids) | Q(sku__in=skus)
+        ).values('id', 'sku', 'stock_quantity')
+
+        by_id = {}
+        by_sku = {}
+        for row in rows:
+            by_id[str(row['id'])] = row
+            by_sku[row['sku']] = row
+
+        original = {key: row['stock_quantity'] for key, row in by_id.items()}
+        current = dict(original)
+        errors = []
+
+        # Apply in request order so repeated products accumulate
+        for index, item in enumerate(adjustments):
+            row = by_id.get(str(item['id'])) if item.get('id') else by_sku.get(item.get('sku'))
+            if row is None:
+                errors.append({'index': index, 'error': 'Product not found.'})
+                continue
+
+            key = str(row['id'])
+            if item.get('quantity') is not None:
+                new_quantity = item['quantity']
+            else:
+                new_quantity = current[key] + item['delta']
+
+            if new_quantity < 0:
+                errors.append({
+                    'index': index,
+                    'error': f"Stock cannot go below zero. Available: {current[key]}"
+                })
+                continue
+            current[key] = new_quantity
+
+        if errors:
+            logger.info(f"Bulk stock adjustment rejected ({len(errors)} errors)")
+            return {'updated': [], 'errors': errors}
+
+        changed = {key: quantity for key, quantity in current.items() if quantity != original[key]}
+        now = timezone.now()
+        keys = list(changed)
+        for start in range(0, len(keys), STOCK_UPDATE_BATCH_SIZE):
+            chunk = keys[start:start + STOCK_UPDATE_BATCH_SIZE]
+            Product.objects.filter(pk__in=chunk).update(
+                stock_quantity=Case(
+                    *[When(pk=key, then=Value(changed[key])) for key in chunk],
+                    output_field=models.PositiveIntegerField()
+                ),
+                updated_at=now
+            )
+
+    logger.info(f"Bulk stock adjustment updated {len(changed)} products")
+
+    return {
+        'updated': [
+            {
+                'id': key,
+                'sku': by_id[key]['sku'],
+                'previous_quantity': original[key],
+                'stock_quantity': quantity
+            }
+            for key, quantity in changed.items()
+        ],
+        'errors': errors
+    }
@@ -0,0 +1,64 @@
+from celery import shared_task
+from PIL import Image, UnidentifiedImageError
+from django.apps import apps
+from django.utils import timezone
+import logging
+
+from .images import generate_image_variants
+from .cache import invalidate_category_caches
+
+logger = logging.getLogger(__name__)
+
+
+def process_image_variants(model_name, pk):
+    """
+    Render and store image variants for one Product or Category
+
+    Args:
+        model_name (str): 'product' or 'category'
+        pk: Primary key of the instance
+
+    Returns:
+        dict: Stored variants, or None if there was nothing to process
+    """
+    model = apps.get_model('products', model_name)
+    instance = model.objects.filter(pk=pk).only('pk', 'image').first()
+    if instance is None or not instance.image:
+        return None
+
+    variants = generate_image_variants(instance.image)
+
+    # Only store the result if the image was not replaced in the meantime
+    updated = model.objects.filter(pk=pk, image=instance.image.name).update(
+        image_variants=variants, updated_at=timezone.now()
+    )
+    if updated and model_name == 'category':
+        invalidate_category_caches()
+    return variants if updated else None
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def generate_image_variants_task(self, model_name, pk):
+    """
+    Generate resized WebP and JPEG variants of an uploaded image asynchronously
+
+    Args:
+        model_name (str): 'product' or 'category'
+        pk (str): Primary key of the instance
+
+    Returns:
+        dict: Result of the image processing
+    """
+    try:
+        variants = process_image_variants(model_name, pk)
+        if variants is None:
+            logger.info(f"No image variants needed for {model_name} {pk}")
+            return {'success': True, 'status': 'skipped'}
+        return {'success': True, 'variants': variants}
+    except (UnidentifiedImageError, Image.DecompressionBombError, FileNotFoundError) as e:
+        # Missing, unreadable or oversized image; retrying will not help
+        logger.error(f"Cannot process image for {model_name} {pk}: {e}")
+        return {'success': False, 'error': str(e)}
+    except Exception as e:
+        logger.error(f"Error generating image variants for {model_name} {pk}: {e}")
+        raise self.retry(exc=e)
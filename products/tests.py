@@ -1,3 +1,828 @@
+import io
+import json
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+import numpy as np
+from PIL import Image
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+from customers.models import Customer
+from orderflow.pagination import KeysetPagination
+from .cache import (
+    CATEGORY_TREE_CACHE_KEY, CategoryMap, category_map, get_category_tree, get_category_version,
+    invalidate_category_caches
+)
+from .analytics import compute_price_distribution
+from .images import IMAGE_VARIANTS
+from .models import Category, CategoryPriceStats, Product
+from .serializers import ProductSerializer
+from .tasks import generate_image_variants_task, process_image_variants
+from .views import ProductViewSet
 
-# Create your tests here.
+requires_postgres = skipUnless(connection.vendor == 'postgresql', 'Requires PostgreSQL')
+
+# Keyword arguments for mock.patch that make every cache call fail like an unreachable Redis
+CACHE_DOWN = {
+    f'{method}.side_effect': ConnectionError('redis down') for method in ('get', 'set', 'add', 'delete')
+}
+
+
+def create_user(email='shopper@example.com', is_staff=False):
+    """Create a customer, optionally with staff rights"""
+    return Customer.objects.create_user(
+        email=email, password='secret', first_name='Test', last_name='User', is_staff=is_staff
+    )
+
+
+def create_product(name, category, price=10, stock_quantity=5, **kwargs):
+    """Create a product in a category"""
+    kwargs.setdefault('description', f'{name} description')
+    return Product.objects.create(
+        name=name, price=price, category=category, stock_quantity=stock_quantity, **kwargs
+    )
+
+
+class CategoryPathTests(TestCase):
+    """Categories keep a materialized path of their ancestors in sync"""
+
+    def setUp(self):
+        self.root = Category.objects.create(name='Electronics')
+        self.phones = Category.objects.create(name='Phones', parent=self.root)
+        self.android = Category.objects.create(name='Android', parent=self.phones)
+        self.other = Category.objects.create(name='Gadgets')
+
+    def test_path_and_depth_on_create(self):
+        self.assertEqual(self.android.path, f'{self.root.pk}/{self.phones.pk}/{self.android.pk}/')
+        self.assertEqual(self.android.depth, 2)
+        self.assertEqual(self.android.ancestor_ids, [self.root.pk, self.phones.pk])
+        self.assertEqual(self.android.full_path, 'Electronics > Phones > Android')
+
+    def test_move_rewrites_subtree_paths(self):
+        self.phones.parent = self.other
+        self.phones.save()
+
+        self.android.refresh_from_db()
+        self.assertEqual(self.android.path, f'{self.other.pk}/{self.phones.pk}/{self.android.pk}/')
+        self.assertEqual(self.android.depth, 2)
+        self.assertEqual(list(self.other.get_descendants()), [self.android, self.phones])
+        self.assertFalse(self.root.get_descendants().exists())
+
+        self.phones.parent = None
+        self.phones.save()
+        self.android.refresh_from_db()
+        self.assertEqual((self.android.path, self.android.depth), (f'{self.phones.pk}/{self.android.pk}/', 1))
+        self.assertEqual(self.android.get_ancestors(), [self.phones])
+
+    def test_move_under_descendant_is_rejected(self):
+        self.root.parent = self.android
+        with self.assertRaises(ValueError):
+            self.root.save()
+
+        self.root.refresh_from_db()
+        self.assertIsNone(self.root.parent_id)
+        self.assertEqual(self.root.path, f'{self.root.pk}/')
+
+
+class CategoryPriceStatsTests(APITestCase):
+    """Subtree price rollups follow product and category writes"""
+
+    def setUp(self):
+        self.root = Category.objects.create(name='Electronics')
+        self.phones = Category.objects.create(name='Phones', parent=self.root)
+        self.laptops = Category.objects.create(name='Laptops', parent=self.root)
+        self.phone = create_product('Phone', self.phones, price=100)
+        self.cheap_phone = create_product('Cheap phone', self.phones, price=20)
+        self.laptop = create_product('Laptop', self.laptops, price=900)
+
+    def stats(self, category):
+        stats = CategoryPriceStats.objects.get(category=category)
+        return stats.product_count, stats.price_sum, stats.min_price, stats.max_price
+
+    def assertMatchesRebuild(self):
+        incremental = {category: self.stats(category) for category in Category.objects.all()}
+        CategoryPriceStats.objects.rebuild()
+        for category, stats in incremental.items():
+            expected = self.stats(category) if stats[0] else stats
+            self.assertEqual(stats, expected, category.name)
+
+    def test_create_rolls_up_to_ancestors(self):
+        self.assertEqual(self.stats(self.phones), (2, 120, 20, 100))
+        self.assertEqual(self.stats(self.root), (3, 1020, 20, 900))
+
+    def test_price_change_and_deactivation(self):
+        self.laptop.price = 10
+        self.laptop.save()
+        self.assertEqual(self.stats(self.root), (3, 130, 10, 100))
+
+        self.cheap_phone.status = 'inactive'
+        self.cheap_phone.save()
+        self.assertEqual(self.stats(self.phones), (1, 100, 100, 100))
+        self.assertMatchesRebuild()
+
+    def test_product_and_category_moves(self):
+        self.phone.category = self.laptops
+        self.phone.save()
+        self.assertEqual(self.stats(self.phones), (1, 20, 20, 20))
+        self.assertEqual(self.stats(self.laptops), (2, 1000, 100, 900))
+
+        self.laptops.parent = None
+        self.laptops.save()
+        self.assertEqual(self.stats(self.root), (1, 20, 20, 20))
+        self.assertMatchesRebuild()
+
+    def test_delete_recomputes_bounds(self):
+        self.laptop.delete()
+        self.assertEqual(self.stats(self.root), (2, 120, 20, 100))
+        self.assertEqual(self.stats(self.laptops)[0], 0)
+
+    def test_average_price_endpoint(self):
+        self.client.force_authenticate(create_user())
+        response = self.client.get('/api/v1/categories/average_price/', {'slug': 'electronics'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['product_count'], 3)
+        self.assertEqual(Decimal(str(response.data['average_price'])), Decimal('340'))
+
+        response = self.client.get('/api/v1/categories/average_price/', {'slug': 'missing'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_average_price_per_category_endpoint(self):
+        self.laptop.status = 'inactive'
+        self.laptop.save()
+        self.client.force_authenticate(create_user())
+        response = self.client.get('/api/v1/categories/average_price_per_category/')
+
+        self.assertEqual(
+            [(row['category_name'], row['average_price'], row['product_count']) for row in response.data],
+            [('Electronics', 60.0, 2), ('Phones', 60.0, 2)]
+        )
+
+    def test_rebuild_command_restores_drifted_rows(self):
+        CategoryPriceStats.objects.filter(category=self.root).update(product_count=99, price_sum=0)
+        call_command('rebuild_category_stats', stdout=io.StringIO())
+        self.assertEqual(self.stats(self.root), (3, 1020, 20, 900))
+
+
+class PriceDistributionTests(APITestCase):
+    """GET /categories/price_distribution/ summarizes every subtree's prices"""
+
+    def setUp(self):
+        cache.clear()
+        self.root = Category.objects.create(name='Electronics')
+        self.phones = Category.objects.create(name='Phones', parent=self.root)
+        for price in (10, 20, 30, 40):
+            create_product(f'Phone {price}', self.phones, price=price)
+        create_product('Cable', self.root, price=110)
+        create_product('Old phone', self.phones, price=500, status='inactive')
+        self.client.force_authenticate(create_user())
+
+    def test_percentiles_and_histogram_per_subtree(self):
+        response = self.client.get('/api/v1/categories/price_distribution/', {'bins': 4})
+        self.assertEqual(response.status_code, 200)
+        stats = {row['category_id']: row for row in response.data}
+
+        phones = stats[self.phones.id]
+        self.assertEqual(phones['product_count'], 4)
+        self.assertEqual((phones['min_price'], phones['median_price'], phones['max_price']), (10, 25, 40))
+        self.assertEqual(phones['p10_price'], 13)
+        self.assertEqual(phones['histogram']['bin_edges'], [10, 17.5, 25, 32.5, 40])
+        self.assertEqual(phones['histogram']['counts'], [1, 1, 1, 1])
+
+        root = stats[self.root.id]
+        self.assertEqual((root['product_count'], root['median_price'], root['max_price']), (5, 30, 110))
+        self.assertEqual(root['histogram']['counts'], [3, 1, 0, 1])
+
+    def test_cache_outage_falls_back_to_computing(self):
+        with mock.patch('products.cache.cache', **CACHE_DOWN):
+            response = self.client.get('/api/v1/categories/price_distribution/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
+
+    def test_products_of_unread_categories_are_skipped(self):
+        # A category created after the categories were read has no lineage yet
+        rows = [(self.phones.id, 10.0), (self.phones.id + 1000, 99.0), (self.root.id, 110.0)]
+        prices = np.array(rows, dtype=[('category', 'i8'), ('price', 'f8')])
+        with mock.patch('products.analytics._load_prices', return_value=prices):
+            stats = {row['category_id']: row for row in compute_price_distribution(bins=2)}
+
+        self.assertEqual(stats[self.phones.id]['product_count'], 1)
+        self.assertEqual((stats[self.root.id]['product_count'], stats[self.root.id]['max_price']), (2, 110))
+
+    def test_bins_must_be_in_range(self):
+        for bins in ('0', '101', 'ten'):
+            response = self.client.get('/api/v1/categories/price_distribution/', {'bins': bins})
+            self.assertEqual(response.status_code, 400)
+
+
+class CategoryListTests(APITestCase):
+    """GET /categories/ resolves parents, child counts and paths in a fixed number of queries"""
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(create_user())
+
+    def add_branch(self, name):
+        root = Category.objects.create(name=name)
+        child = Category.objects.create(name=f'{name} child', parent=root)
+        Category.objects.create(name=f'{name} grandchild', parent=child)
+
+    def list_categories(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v1/categories/')
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_queries_do_not_grow_with_categories(self):
+        self.add_branch('Audio')
+        _, baseline = self.list_categories()
+
+        for name in ('Books', 'Garden', 'Kitchen'):
+            self.add_branch(name)
+        response, query_count = self.list_categories()
+
+        self.assertEqual(query_count, baseline)
+        rows = {row['name']: row for row in response.data['results']}
+        self.assertEqual(rows['Books child']['parent_name'], 'Books')
+        self.assertEqual(rows['Books child']['children_count'], 1)
+        self.assertEqual(rows['Books grandchild']['full_path'], 'Books > Books child > Books grandchild')
+        self.assertEqual(rows['Books grandchild']['level'], 2)
+
+
+class ImageVariantTests(TestCase):
+    """Uploaded images are rendered into resized WebP and JPEG variants"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = self.settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        patcher = mock.patch('products.signals.generate_image_variants_task')
+        self.task = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.category = Category.objects.create(name='Art')
+
+    def image(self, color='red', size=(2000, 1000), mode='RGBA'):
+        buffer = io.BytesIO()
+        Image.new(mode, size, color).save(buffer, 'PNG')
+        return SimpleUploadedFile('poster.png', buffer.getvalue(), content_type='image/png')
+
+    def test_upload_queues_variants_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            product = create_product('Poster', self.category, image=self.image())
+        self.task.delay.assert_called_once_with('product', str(product.pk))
+
+        self.task.reset_mock()
+        with self.captureOnCommitCallbacks(execute=True):
+            product.price = 12
+            product.save()
+        self.task.delay.assert_not_called()
+
+    def test_variants_are_rendered_and_stored(self):
+        product = create_product('Poster', self.category, image=self.image())
+        variants = process_image_variants('product', product.pk)
+
+        self.assertEqual(
+            {name: (variants[name]['width'], variants[name]['height']) for name in IMAGE_VARIANTS},
+            {'thumbnail': (150, 75), 'card': (400, 200), 'zoom': (1600, 800)}
+        )
+        for name in IMAGE_VARIANTS:
+            with default_storage.open(variants[name]['jpeg']) as rendered:
+                self.assertEqual(Image.open(rendered).format, 'JPEG')
+            self.assertTrue(default_storage.exists(variants[name]['webp']))
+
+        product.refresh_from_db()
+        self.assertEqual(product.image_variants, variants)
+
+    def test_same_content_reuses_stored_files(self):
+        first = create_product('Poster', self.category, image=self.image())
+        second = create_product('Poster copy', self.category, image=self.image())
+
+        self.assertEqual(
+            process_image_variants('product', first.pk)['card'],
+            process_image_variants('product', second.pk)['card']
+        )
+
+    def test_replaced_image_clears_variants(self):
+        product = create_product('Poster', self.category, image=self.image())
+        process_image_variants('product', product.pk)
+
+        product.image = self.image(color='blue')
+        product.save()
+        product.refresh_from_db()
+        self.assertEqual(product.image_variants, {})
+
+    def test_unreadable_image_is_not_retried(self):
+        product = create_product('Poster', self.category, image=SimpleUploadedFile('poster.png', b'not an image'))
+        result = generate_image_variants_task.apply(args=('product', str(product.pk))).get()
+        self.assertFalse(result['success'])
+
+
+class CategoryTreeCacheTests(TestCase):
+    """The cached category tree follows the shared category version"""
+
+    def setUp(self):
+        cache.clear()
+        self.root = Category.objects.create(name='Electronics')
+
+    def test_tree_is_rebuilt_after_category_change(self):
+        content, etag = get_category_tree()
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name='Phones', parent=self.root)
+
+        new_content, new_etag = get_category_tree()
+        self.assertNotEqual(etag, new_etag)
+        self.assertIn(b'Phones', new_content)
+
+    def test_tree_built_before_invalidation_is_not_served(self):
+        # A tree stored under the old version after the bump must stay unused
+        old_version = get_category_version()
+        invalidate_category_caches()
+        cache.set(f"{CATEGORY_TREE_CACHE_KEY}:{old_version}", (b'[]', '"stale"'))
+
+        self.assertNotEqual(get_category_tree()[1], '"stale"')
+
+    def test_cache_errors_fall_back_to_building(self):
+        with mock.patch('products.cache.cache.get', side_effect=ConnectionError('redis down')):
+            content, etag = get_category_tree()
+        self.assertIn(b'Electronics', content)
+
+
+class CategoryMapTests(TestCase):
+    """Each process keeps a category map and reloads it when the shared version moves on"""
+
+    def setUp(self):
+        cache.clear()
+        self.root = Category.objects.create(name='Electronics')
+        self.phones = Category.objects.create(name='Phones', parent=self.root)
+        self.category_map = CategoryMap()
+
+    def test_lookups_are_served_from_memory(self):
+        self.assertEqual(self.category_map.get(self.phones.id).full_path, 'Electronics > Phones')
+        with self.assertNumQueries(0):
+            info = self.category_map.get(self.phones.id)
+        self.assertEqual(info.ancestor_ids, [self.root.id])
+
+    def test_new_category_triggers_reload(self):
+        self.category_map.get(self.root.id)
+        tablets = Category.objects.create(name='Tablets', parent=self.root)
+        self.assertEqual(self.category_map.get(tablets.id).full_path, 'Electronics > Tablets')
+
+    @mock.patch('products.cache.CATEGORY_MAP_CHECK_INTERVAL', 0)
+    def test_rename_elsewhere_is_picked_up(self):
+        self.category_map.get(self.phones.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.root.name = 'Devices'
+            self.root.save()
+
+        self.assertEqual(self.category_map.get(self.phones.id).full_path, 'Devices > Phones')
+
+    def test_product_serializer_uses_the_map(self):
+        product = create_product('Phone', self.phones)
+        product = Product.objects.get(pk=product.pk)
+        category_map.get(self.phones.id)
+
+        with self.assertNumQueries(0):
+            path = ProductSerializer().get_category_path(product)
+        self.assertEqual(path, 'Electronics > Phones')
+
+
+class CategoryTreeViewTests(APITestCase):
+    """GET /categories/tree/ answers repeat requests with 304"""
+
+    def setUp(self):
+        cache.clear()
+        Category.objects.create(name='Electronics')
+        self.client.force_authenticate(create_user())
+
+    def test_etag_round_trip(self):
+        response = self.client.get('/api/v1/categories/tree/')
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get('/api/v1/categories/tree/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+
+class ConditionalGetTests(APITestCase):
+    """Catalog lists and details answer revalidation with 304"""
+
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Toys')
+        self.ball = create_product('Ball', self.category)
+        self.kite = create_product('Kite', self.category)
+        self.client.force_authenticate(create_user())
+
+    def test_list_etag_follows_changes(self):
+        response = self.client.get('/api/v1/products/')
+        etag = response['ETag']
+        self.assertEqual(self.client.get('/api/v1/products/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.ball.price = 12
+        self.ball.save()
+        response = self.client.get('/api/v1/products/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        etag = response['ETag']
+        self.kite.delete()
+        self.assertEqual(self.client.get('/api/v1/products/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etag_depends_on_query(self):
+        etag = self.client.get('/api/v1/products/')['ETag']
+        response = self.client.get('/api/v1/products/', {'ordering': 'name'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail_not_modified_skips_serialization(self):
+        url = f'/api/v1/products/{self.ball.id}/'
+        response = self.client.get(url)
+
+        with mock.patch.object(ProductSerializer, 'to_representation') as to_representation:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        to_representation.assert_not_called()
+
+    def test_category_rename_changes_product_etag(self):
+        etag = self.client.get('/api/v1/products/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = 'Games'
+            self.category.save()
+
+        self.assertEqual(self.client.get('/api/v1/products/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_category_rename_is_not_hidden_by_if_modified_since(self):
+        # Embedded category names change without touching the row's updated_at
+        child = Category.objects.create(name='Board games', parent=self.category)
+        urls = [f'/api/v1/products/{self.ball.id}/', f'/api/v1/categories/{child.id}/']
+        for url in urls:
+            self.assertNotIn('Last-Modified', self.client.get(url))
+
+        since = http_date(time.time() + 60)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = 'Games'
+            self.category.save()
+
+        product = self.client.get(urls[0], HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual((product.status_code, product.data['category_name']), (200, 'Games'))
+        category = self.client.get(urls[1], HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual((category.status_code, category.data['full_path']), (200, 'Games > Board games'))
+
+    def test_missing_detail_is_404(self):
+        self.assertEqual(self.client.get('/api/v1/products/not-a-uuid/').status_code, 404)
+
+
+class SparseFieldsetTests(APITestCase):
+    """?fields= and ?exclude= trim read responses and the queries behind them"""
+
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Toys')
+        create_product('Ball', self.category)
+        self.client.force_authenticate(create_user(is_staff=True))
+
+    def test_fields_and_exclude(self):
+        response = self.client.get('/api/v1/products/', {'fields': 'id, name,unknown'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'name'})
+
+        response = self.client.get('/api/v1/products/', {'exclude': 'description,category_path'})
+        row = response.data['results'][0]
+        self.assertNotIn('description', row)
+        self.assertNotIn('category_path', row)
+        self.assertEqual(row['category_name'], 'Toys')
+
+    def sql(self, url, params):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, params)
+        return ' '.join(query['sql'] for query in queries)
+
+    def test_unrequested_relations_are_not_loaded(self):
+        self.assertIn('JOIN "categories"', self.sql('/api/v1/products/', {}))
+        self.assertNotIn('JOIN "categories"', self.sql('/api/v1/products/', {'fields': 'id,name'}))
+
+        self.assertIn('"children_count"', self.sql('/api/v1/categories/', {}))
+        self.assertNotIn('"children_count"', self.sql('/api/v1/categories/', {'exclude': 'children_count'}))
+
+    def test_writes_return_the_full_representation(self):
+        response = self.client.post(
+            '/api/v1/products/?fields=id',
+            {'name': 'Kite', 'description': 'Red kite', 'price': '15.00', 'category': self.category.id},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertIn('price', response.data)
+
+
+class ProductSearchTests(APITestCase):
+    """GET /products/search/ keeps rank order even when a cursor is passed"""
+
+    def setUp(self):
+        category = Category.objects.create(name='Audio')
+        create_product('Speaker stand', category, description='Holds a speaker')
+        create_product('Speaker speaker', category, description='A speaker with speaker cable')
+        self.client.force_authenticate(create_user())
+
+    @requires_postgres
+    def test_cursor_falls_back_to_ranked_pages(self):
+        response = self.client.get('/api/v1/products/search/', {'q': 'speaker', 'cursor': ''})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(
+            [product['name'] for product in response.data['results']],
+            ['Speaker speaker', 'Speaker stand']
+        )
+
+    def test_search_ignores_cursor(self):
+        request = Request(APIRequestFactory().get('/api/v1/products/search/', {'cursor': ''}))
+        view = SimpleNamespace(action='search', keyset_excluded_actions=ProductViewSet.keyset_excluded_actions)
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(Product.objects.order_by('name'), request, view)
+
+        self.assertFalse(paginator.use_keyset)
+        self.assertEqual([product.name for product in page], ['Speaker speaker', 'Speaker stand'])
+
+    def test_search_requires_query(self):
+        response = self.client.get('/api/v1/products/search/')
+        self.assertEqual(response.status_code, 400)
+
+
+class ProductSuggestTests(APITestCase):
+    """GET /products/suggest/ completes product and category names"""
+
+    def setUp(self):
+        cache.clear()
+        audio = Category.objects.create(name='Audio')
+        Category.objects.create(name='Audio cables', parent=audio)
+        create_product('Headphones', audio, sku='HP-100')
+        create_product('Headphone stand', audio)
+        create_product('Old headphones', audio, status='inactive')
+        self.client.force_authenticate(create_user())
+
+    def test_short_query_is_rejected(self):
+        for term in ('', 'h', ' h '):
+            response = self.client.get('/api/v1/products/suggest/', {'q': term})
+            self.assertEqual(response.status_code, 400)
+
+    @requires_postgres
+    def test_suggestions_are_ranked_by_similarity(self):
+        response = self.client.get('/api/v1/products/suggest/', {'q': 'headphones'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [product['name'] for product in response.data['products']],
+            ['Headphones', 'Headphone stand']
+        )
+
+        response = self.client.get('/api/v1/products/suggest/', {'q': 'AUDIO', 'limit': 1})
+        self.assertEqual([category['name'] for category in response.data['categories']], ['Audio'])
+
+    @requires_postgres
+    def test_cache_outage_falls_back_to_querying(self):
+        with mock.patch('products.cache.cache', **CACHE_DOWN):
+            response = self.client.get('/api/v1/products/suggest/', {'q': 'headphones'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['products']), 2)
+
+    @requires_postgres
+    def test_sku_matches(self):
+        response = self.client.get('/api/v1/products/suggest/', {'q': 'hp-1'})
+        self.assertEqual([product['name'] for product in response.data['products']], ['Headphones'])
+
+
+class ProductKeysetPaginationTests(APITestCase):
+    """GET /products/?cursor= walks the catalog newest first"""
+
+    def setUp(self):
+        category = Category.objects.create(name='Books')
+        self.products = [create_product(f'Book {i}', category) for i in range(25)]
+        self.client.force_authenticate(create_user())
+
+    def test_cursor_pages_cover_every_product(self):
+        response = self.client.get('/api/v1/products/', {'cursor': ''})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('count', response.data)
+        seen = [product['id'] for product in response.data['results']]
+
+        response = self.client.get(response.data['next'])
+        seen += [product['id'] for product in response.data['results']]
+        self.assertIsNone(response.data['next'])
+
+        expected = [str(p.id) for p in sorted(self.products, key=lambda p: (p.created_at, p.id), reverse=True)]
+        self.assertEqual(seen, expected)
+
+    def test_cursor_with_ordering_is_rejected(self):
+        response = self.client.get('/api/v1/products/', {'cursor': '', 'ordering': 'price'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/v1/products/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+
+class ProductImportTests(APITestCase):
+    """POST /products/bulk_import/ and the import_products command"""
+
+    def setUp(self):
+        self.category = Category.objects.create(name='Kitchen')
+        create_product('Kettle', self.category, sku='KETTLE-1')
+        self.client.force_authenticate(create_user(is_staff=True))
+
+    def upload(self, content, **data):
+        upload = SimpleUploadedFile('products.csv', content.encode(), content_type='text/csv')
+        return self.client.post('/api/v1/products/bulk_import/', {'file': upload, **data}, format='multipart')
+
+    def test_import_reports_created_and_failed_rows(self):
+        response = self.upload(
+            'name,description,price,category,stock_quantity,sku\n'
+            'Kettle,Steel kettle,20,kitchen,3,\n'
+            'Kettle,Glass kettle,25,kitchen,3,\n'
+            'Toaster,Two slots,30,kitchen,1,kettle-1\n'
+            'Pan,,10,kitchen,1,\n'
+            'Pot,Big pot,15,kitchen,2,POT-1\n',
+            batch_size=2
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 3)
+        self.assertEqual(
+            sorted((error['row'], list(error['errors'])) for error in response.data['errors']),
+            [(3, ['sku']), (4, ['description'])]
+        )
+        self.assertEqual(
+            set(Product.objects.filter(name='Kettle').values_list('slug', flat=True)),
+            {'kettle', 'kettle-2', 'kettle-3'}
+        )
+        self.assertTrue(Product.objects.filter(sku='POT-1').exists())
+        self.assertEqual(self.category.price_stats.product_count, 4)
+
+    def test_non_positive_batch_size_is_rejected(self):
+        for batch_size in ('0', '-5', 'abc'):
+            response = self.upload('name,description,price,category\nPan,Pan,1,kitchen\n', batch_size=batch_size)
+            self.assertEqual(response.status_code, 400)
+        self.assertFalse(Product.objects.filter(name='Pan').exists())
+
+    def test_command_rejects_non_positive_batch_size(self):
+        with self.assertRaises(CommandError):
+            call_command('import_products', 'products.csv', '--batch-size', '-1')
+
+
+class BulkStockTests(APITestCase):
+    """POST /products/bulk_stock/ applies many stock changes in one transaction"""
+
+    def setUp(self):
+        category = Category.objects.create(name='Tools')
+        self.hammer = create_product('Hammer', category, stock_quantity=10, sku='HAMMER')
+        self.saw = create_product('Saw', category, stock_quantity=2, sku='SAW')
+        self.client.force_authenticate(create_user(is_staff=True))
+
+    def adjust(self, *adjustments):
+        return self.client.post('/api/v1/products/bulk_stock/', {'adjustments': list(adjustments)}, format='json')
+
+    def stock(self, product):
+        product.refresh_from_db()
+        return product.stock_quantity
+
+    def test_absolute_and_relative_changes(self):
+        response = self.adjust(
+            {'id': str(self.hammer.id), 'delta': -3},
+            {'sku': 'HAMMER', 'delta': -2},
+            {'sku': 'SAW', 'quantity': 7}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((self.stock(self.hammer), self.stock(self.saw)), (5, 7))
+        updated = {row['sku']: (row['previous_quantity'], row['stock_quantity']) for row in response.data['updated']}
+        self.assertEqual(updated, {'HAMMER': (10, 5), 'SAW': (2, 7)})
+        self.assertEqual(response.data['errors'], [])
+
+    def test_unknown_product_rejects_the_batch(self):
+        response = self.adjust({'sku': 'HAMMER', 'delta': -3}, {'sku': 'MISSING', 'delta': 1})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'], [{'index': 1, 'error': 'Product not found.'}])
+        self.assertEqual(response.data['updated'], [])
+        self.assertEqual(self.stock(self.hammer), 10)
+
+    def test_stock_cannot_go_negative(self):
+        response = self.adjust({'sku': 'HAMMER', 'quantity': 1}, {'sku': 'SAW', 'delta': -1}, {'sku': 'SAW', 'delta': -5})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'][0]['index'], 2)
+        self.assertEqual((self.stock(self.hammer), self.stock(self.saw)), (10, 2))
+
+    def test_invalid_payloads(self):
+        self.assertEqual(self.adjust().status_code, 400)
+        self.assertEqual(self.adjust({'sku': 'SAW'}).status_code, 400)
+        self.assertEqual(self.adjust({'id': str(self.saw.id), 'sku': 'SAW', 'delta': 1}).status_code, 400)
+        self.assertEqual(self.adjust({'sku': 'SAW', 'quantity': -1}).status_code, 400)
+        self.assertEqual(self.stock(self.saw), 2)
+
+    def test_requires_staff(self):
+        self.client.force_authenticate(create_user('shopper2@example.com'))
+        self.assertEqual(self.adjust({'sku': 'SAW', 'delta': 1}).status_code, 403)
+
+
+class ProductExportTests(APITestCase):
+    """GET /products/export/ streams CSV or NDJSON, optionally incrementally"""
+
+    def setUp(self):
+        category = Category.objects.create(name='Garden')
+        self.old = create_product('Rake', category)
+        Product.objects.filter(pk=self.old.pk).update(updated_at=timezone.now() - timedelta(days=2))
+        self.new = create_product('Hose', category)
+        self.client.force_authenticate(create_user())
+
+    def export(self, **params):
+        response = self.client.get('/api/v1/products/export/', params)
+        body = b''.join(response.streaming_content).decode() if response.streaming else ''
+        return response, body
+
+    def test_csv_export(self):
+        response, body = self.export(format='csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        lines = body.strip().splitlines()
+        self.assertTrue(lines[0].startswith('id,name,slug'))
+        self.assertEqual(len(lines), 3)
+        self.assertIn('Garden', lines[1])
+
+    def test_naive_updated_since_is_read_as_utc(self):
+        since = (timezone.now() - timedelta(days=1)).replace(tzinfo=None).isoformat()
+        response, body = self.export(format='ndjson', updated_since=since)
+
+        self.assertEqual(response.status_code, 200)
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row['id'] for row in rows], [str(self.new.id)])
+
+    def test_watermark_overlaps_export_start(self):
+        response, _ = self.export(format='ndjson')
+        started_at = datetime.fromisoformat(response['X-Export-Started-At'])
+        watermark = datetime.fromisoformat(response['X-Export-Watermark'])
+        self.assertLess(watermark, started_at)
+
+    def test_invalid_updated_since_returns_json_error(self):
+        for value in ('yesterday', '2026-13-45T00:00:00'):
+            response, _ = self.export(format='csv', updated_since=value)
+            self.assertEqual(response.status_code, 400)
+            self.assertTrue(response['Content-Type'].startswith('application/json'))
+            self.assertIn('error', json.loads(response.content))
+
+
+class ProductFacetsTests(APITestCase):
+    """GET /products/facets/ counts the filtered list per category, status and price band"""
+
+    def setUp(self):
+        cache.clear()
+        root = Category.objects.create(name='Electronics')
+        phones = Category.objects.create(name='Phones', parent=root)
+        create_product('Phone', phones, price=300, is_featured=True)
+        create_product('Charger', root, price=15)
+        create_product('Old phone', phones, price=50, status='inactive')
+        self.root, self.phones = root, phones
+        self.client.force_authenticate(create_user())
+
+    def test_counts_roll_up_to_parent_categories(self):
+        response = self.client.get('/api/v1/products/facets/')
+
+        self.assertEqual(response.data['total'], 2)
+        counts = {category['id']: category['count'] for category in response.data['categories']}
+        self.assertEqual(counts, {self.root.id: 2, self.phones.id: 1})
+        bands = {band['label']: band['count'] for band in response.data['price'] if band['count']}
+        self.assertEqual(bands, {'10-25': 1, '250-500': 1})
+
+    def test_status_facet_counts_every_status(self):
+        response = self.client.get('/api/v1/products/facets/')
+        statuses = {status['value']: status['count'] for status in response.data['status']}
+        self.assertEqual(statuses, {'active': 2, 'inactive': 1})
+
+        response = self.client.get('/api/v1/products/facets/', {'status': 'inactive'})
+        self.assertEqual(response.data['total'], 1)
+        self.assertEqual(response.data['categories'][0]['count'], 1)
+
+    def test_cache_outage_falls_back_to_counting(self):
+        with mock.patch('products.cache.cache', **CACHE_DOWN):
+            response = self.client.get('/api/v1/products/facets/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total'], 2)
+
+    def test_repeated_values_are_not_shared_in_the_cache(self):
+        # The last value wins, so these two requests filter differently
+        featured = self.client.get('/api/v1/products/facets/?is_featured=false&is_featured=true')
+        not_featured = self.client.get('/api/v1/products/facets/?is_featured=true&is_featured=false')
+
+        self.assertEqual(featured.data['total'], 1)
+        self.assertEqual(not_featured.data['total'], 1)
+        self.assertEqual(featured.data['categories'][0]['count'], 1)
+        self.assertNotEqual(featured.data['price'], not_featured.data['price'])
@@ -1,18 +1,48 @@
+import hashlib
+from datetime import timezone as dt_timezone
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.parsers import MultiPartParser
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Avg, Min, Max, Count
+from django.contrib.postgres.search import (
+    SearchHeadline, SearchQuery, SearchRank, TrigramSimilarity
+)
+from django.db.models import Count, F, Q
+from django.db.models.functions import Greatest
 from django.shortcuts import get_object_or_404
-from .models import Category, Product
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.dateparse import parse_datetime
+from django.utils.text import compress_sequence
+from django.utils.http import parse_etags, urlencode
+from orderflow.conditional import ConditionalGetMixin
+from orderflow.fieldsets import wants_field
+from orderflow.pagination import KeysetPagination
+from .models import Category, Product, CategoryPriceStats
+from .cache import cache_get, cache_set, get_category_tree, get_category_version
+from .analytics import get_price_distribution
+from .importer import ProductImporter
+from .stock import bulk_adjust_stock
+from .export import CSVExportRenderer, NDJSONExportRenderer, EXPORT_WATERMARK_OVERLAP, stream_export
+from .facets import compute_facets
 from .serializers import (
     CategorySerializer, CategoryTreeSerializer, ProductSerializer,
-    ProductUploadSerializer, CategoryAveragePriceSerializer
+    ProductUploadSerializer, ProductSearchSerializer, CategoryAveragePriceSerializer,
+    StockAdjustmentSerializer
 )
 
+SUGGEST_MIN_LENGTH = 2
+SUGGEST_MAX_RESULTS = 20
+SUGGEST_CACHE_TIMEOUT = 5
+FACETS_CACHE_TIMEOUT = 60
+# Query parameters that change the page or order but not the facet counts
+FACETS_IGNORED_PARAMS = {'page', 'page_size', 'cursor', 'ordering', 'format', 'fields', 'exclude'}
+
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for Category model with hierarchical support"""
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
@@ -23,13 +53,26 @@ class CategoryViewSet(viewsets.ModelViewSet):
     ordering_fields = ['name', 'created_at']
     ordering = ['name']
     
-    def get_queryset(self):
+    def get_validator_queryset(self):
         """Return active categories by default"""
         queryset = Category.objects.all()
         if self.action == 'list':
             queryset = queryset.filter(is_active=True)
         return queryset
     
+    def get_queryset(self):
+        """Return active categories by default, with requested hierarchy data resolved in SQL"""
+        queryset = self.get_validator_queryset()
+        if wants_field(self.request, 'parent_name'):
+            queryset = queryset.select_related('parent')
+        if wants_field(self.request, 'children_count'):
+            queryset = queryset.annotate(children_count=Count('children'))
+        return queryset
+    
+    def get_validator_extra(self):
+        """Parent names, paths and child counts change with other categories"""
+        return get_category_version()
+    
     def get_serializer_class(self):
         """Return appropriate serializer based on action"""
         if self.action == 'tree':
@@ -38,10 +81,15 @@ class CategoryViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def tree(self, request):
-        """Get hierarchical category tree"""
-        root_categories = Category.objects.filter(parent=None, is_active=True)
-        serializer = self.get_serializer(root_categories, many=True)
-        return Response(serializer.data)
+        """Get hierarchical category tree (cached, served with an ETag)"""
+        content, etag = get_category_tree()
+        
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(content, content_type='application/json')
+        response['ETag'] = etag
+        return response
     
     @action(detail=False, methods=['get'])
     def average_price(self, request):
@@ -54,21 +102,17 @@ class CategoryViewSet(viewsets.ModelViewSet):
             )
         
         try:
-            category = Category.objects.get(slug=slug)
+            category = Category.objects.select_related('price_stats').get(slug=slug)
         except Category.DoesNotExist:
             return Response(
                 {'error': 'Category not found'}, 
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # Get products in this category and its descendants
-        descendant_ids = [category.id] + [c.id for c in category.get_descendants()]
-        products = Product.objects.filter(
-            category_id__in=descendant_ids,
-            status='active'
-        )
+        # Subtree-inclusive rollup maintained on product and category writes
+        stats = getattr(category, 'price_stats', None)
         
-        if not products.exists():
+        if stats is None or stats.product_count <= 0:
             return Response({
                 'category_id': category.id,
                 'category_name': category.name,
@@ -79,22 +123,14 @@ class CategoryViewSet(viewsets.ModelViewSet):
                 'max_price': 0
             })
         
-        # Calculate statistics
-        stats = products.aggregate(
-            avg_price=Avg('price'),
-            min_price=Min('price'),
-            max_price=Max('price'),
-            product_count=Count('id')
-        )
-        
         data = {
             'category_id': category.id,
             'category_name': category.name,
             'category_slug': category.slug,
-            'average_price': stats['avg_price'] or 0,
-            'product_count': stats['product_count'],
-            'min_price': stats['min_price'] or 0,
-            'max_price': stats['max_price'] or 0
+            'average_price': stats.average_price,
+            'product_count': stats.product_count,
+            'min_price': stats.min_price or 0,
+            'max_price': stats.max_price or 0
         }
         
         serializer = CategoryAveragePriceSerializer(data)
@@ -103,64 +139,80 @@ class CategoryViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def average_price_per_category(self, request):
         """Get average price for all categories"""
-        from django.db.models import Avg, Count
+        # Get all categories with active products in their subtree
+        stats_list = CategoryPriceStats.objects.filter(
+            product_count__gt=0
+        ).select_related('category').order_by('category__name')
         
-        # Get all categories with products
-        categories = Category.objects.filter(
-            products__isnull=False
-        ).distinct()
-        
-        result = []
-        for category in categories:
-            # Get products in this category and its descendants
-            descendant_ids = [category.id] + [c.id for c in category.get_descendants()]
-            products = Product.objects.filter(
-                category_id__in=descendant_ids,
-                status='active'
-            )
-            
-            if products.exists():
-                avg_price = products.aggregate(avg_price=Avg('price'))['avg_price'] or 0
-                product_count = products.count()
-                
-                result.append({
-                    'category_id': category.id,
-                    'category_name': category.name,
-                    'category_slug': category.slug,
-                    'average_price': float(avg_price),
-                    'product_count': product_count
-                })
+        result = [
+            {
+                'category_id': stats.category.id,
+                'category_name': stats.category.name,
+                'category_slug': stats.category.slug,
+                'average_price': float(stats.average_price),
+                'product_count': stats.product_count
+            }
+            for stats in stats_list
+        ]
         
         return Response(result)
+    
+    @action(detail=False, methods=['get'])
+    def price_distribution(self, request):
+        """Get price percentiles and histogram for every category subtree"""
+        try:
+            bins = int(request.query_params.get('bins', 10))
+        except ValueError:
+            bins = 0
+        
+        if not 1 <= bins <= 100:
+            return Response(
+                {'error': 'bins must be an integer between 1 and 100'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response(get_price_distribution(bins))
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """ViewSet for Product model with upload support"""
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
+    pagination_class = KeysetPagination
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['category', 'status', 'is_featured']
     search_fields = ['name', 'description', 'sku']
     ordering_fields = ['name', 'price', 'created_at', 'stock_quantity']
     ordering = ['-created_at']
+    # Search results are ordered by rank, which a (created_at, id) cursor would discard
+    keyset_excluded_actions = ['search']
     
     def get_queryset(self):
         """Return active products by default"""
-        queryset = Product.objects.select_related('category')
-        if self.action == 'list':
+        queryset = Product.objects.all()
+        if wants_field(self.request, 'category_name'):
+            queryset = queryset.select_related('category')
+        # Facets count every status and apply the default to the other facets themselves
+        if self.action in ['list', 'search']:
             queryset = queryset.filter(status='active')
         return queryset
     
+    def get_validator_extra(self):
+        """Category names and paths are embedded in product responses"""
+        return get_category_version()
+    
     def get_serializer_class(self):
         """Return appropriate serializer based on action"""
         if self.action == 'upload':
             return ProductUploadSerializer
+        if self.action == 'search':
+            return ProductSearchSerializer
         return ProductSerializer
     
     def get_permissions(self):
         """Set permissions based on action"""
-        if self.action in ['create', 'update', 'partial_update', 'destroy', 'upload']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'upload', 'bulk_import', 'bulk_stock']:
             return [IsAdminUser()]
         return [IsAuthenticated()]
     
@@ -174,6 +226,104 @@ class ProductViewSet(viewsets.ModelViewSet):
             return Response(response_serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser])
+    def bulk_import(self, request):
+        """Bulk import products from an uploaded CSV or JSONL file"""
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response(
+                {'error': 'file is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        file_format = request.data.get('file_format') or upload.name.rsplit('.', 1)[-1].lower()
+        
+        batch_size = request.data.get('batch_size') or None
+        if batch_size is not None:
+            try:
+                batch_size = int(batch_size)
+            except ValueError:
+                batch_size = 0
+            if batch_size < 1:
+                return Response(
+                    {'error': 'batch_size must be a positive integer'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
+        try:
+            report = ProductImporter(batch_size=batch_size).run(upload, file_format)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        response_status = status.HTTP_201_CREATED if report['created'] else status.HTTP_400_BAD_REQUEST
+        return Response(report, status=response_status)
+    
+    @action(detail=False, methods=['post'])
+    def bulk_stock(self, request):
+        """Apply many stock changes by id or SKU in one transaction, or none of them"""
+        adjustments = request.data.get('adjustments') if isinstance(request.data, dict) else request.data
+        if not isinstance(adjustments, list) or not adjustments:
+            return Response(
+                {'error': 'adjustments must be a non-empty list'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        serializer = StockAdjustmentSerializer(data=adjustments, many=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        result = bulk_adjust_stock(serializer.validated_data)
+        if result['errors']:
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
+    
+    @action(detail=False, methods=['get'], renderer_classes=[CSVExportRenderer, NDJSONExportRenderer])
+    def export(self, request):
+        """Stream the whole catalog, or the rows changed since a timestamp, as CSV or NDJSON"""
+        renderer = request.accepted_renderer
+        export_format = renderer.format
+        
+        # Taken before the query; the watermark derived from it overlaps
+        # this export to cover transactions still in flight
+        started_at = timezone.now()
+        queryset = Product.objects.order_by('updated_at', 'id')
+        
+        updated_since = request.query_params.get('updated_since')
+        if updated_since:
+            try:
+                since = parse_datetime(updated_since.replace(' ', '+'))
+            except ValueError:
+                since = None
+            if since is None:
+                return Response(
+                    {'error': 'updated_since must be an ISO 8601 datetime'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if timezone.is_naive(since):
+                since = since.replace(tzinfo=dt_timezone.utc)
+            queryset = queryset.filter(updated_at__gte=since)
+        
+        product_status = request.query_params.get('status')
+        if product_status:
+            queryset = queryset.filter(status=product_status)
+        
+        content = stream_export(queryset, export_format)
+        filename = f"products-{started_at:%Y%m%dT%H%M%S}.{export_format}"
+        
+        use_gzip = 'gzip' in request.headers.get('Accept-Encoding', '')
+        if use_gzip:
+            content = compress_sequence(content)
+        
+        response = StreamingHttpResponse(content, content_type=f'{renderer.media_type}; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response['X-Export-Started-At'] = started_at.isoformat()
+        # Value to pass as updated_since on the next incremental pull
+        response['X-Export-Watermark'] = (started_at - EXPORT_WATERMARK_OVERLAP).isoformat()
+        if use_gzip:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+    
     @action(detail=True, methods=['post'])
     def toggle_featured(self, request, pk=None):
         """Toggle product featured status"""
@@ -195,6 +345,112 @@ class ProductViewSet(viewsets.ModelViewSet):
         serializer = ProductSerializer(featured_products, many=True)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Full-text product search ranked by relevance, with highlighted snippets"""
+        term = request.query_params.get('q', '').strip()
+        if not term:
+            return Response(
+                {'error': 'q parameter is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        query = SearchQuery(term, search_type='websearch', config='english')
+        products = self.get_queryset().filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query),
+            name_highlight=SearchHeadline(
+                'name', query, config='english',
+                start_sel='<mark>', stop_sel='</mark>', highlight_all=True
+            ),
+            snippet=SearchHeadline(
+                'description', query, config='english',
+                start_sel='<mark>', stop_sel='</mark>', min_words=15, max_words=35
+            )
+        ).order_by('-rank', '-created_at')
+        
+        page = self.paginate_queryset(products)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        
+        serializer = self.get_serializer(products, many=True)
+        return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def suggest(self, request):
+        """Lightweight typeahead over product name/SKU and category name"""
+        term = request.query_params.get('q', '').strip().lower()
+        if len(term) < SUGGEST_MIN_LENGTH:
+            return Response(
+                {'error': f'q must be at least {SUGGEST_MIN_LENGTH} characters'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            limit = min(int(request.query_params.get('limit', 10)), SUGGEST_MAX_RESULTS)
+        except ValueError:
+            limit = 10
+        limit = max(limit, 1)
+        
+        # Hot prefixes repeat across users; cache them briefly
+        cache_key = f"products:suggest:{limit}:{hashlib.md5(term.encode()).hexdigest()}"
+        data = cache_get(cache_key)
+        if data is not None:
+            return Response(data)
+        
+        products = Product.objects.filter(
+            Q(name__icontains=term) | Q(sku__icontains=term),
+            status='active'
+        ).annotate(
+            similarity=Greatest(TrigramSimilarity('name', term), TrigramSimilarity('sku', term))
+        ).order_by('-similarity', 'name').values('id', 'name', 'slug', 'price')[:limit]
+        
+        categories = Category.objects.filter(
+            name__icontains=term,
+            is_active=True
+        ).annotate(
+            similarity=TrigramSimilarity('name', term)
+        ).order_by('-similarity', 'name').values('id', 'name', 'slug')[:limit]
+        
+        data = {
+            'products': [
+                {
+                    'id': str(product['id']),
+                    'name': product['name'],
+                    'slug': product['slug'],
+                    'price': str(product['price'])
+                }
+                for product in products
+            ],
+            'categories': list(categories)
+        }
+        cache_set(cache_key, data, SUGGEST_CACHE_TIMEOUT)
+        return Response(data)
+    
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """Get category, status and price band counts for the current list filters"""
+        # Values are kept exactly as sent: filters can be case-sensitive and
+        # the last of repeated values wins, so neither may be normalized away
+        filter_key = urlencode(
+            [(key, request.query_params.getlist(key))
+             for key in sorted(request.query_params) if key not in FACETS_IGNORED_PARAMS],
+            doseq=True
+        )
+        
+        # Category names are embedded, so the key also moves with the category version
+        digest = hashlib.md5(f"{get_category_version()}|{filter_key}".encode()).hexdigest()
+        cache_key = f"products:facets:{digest}"
+        data = cache_get(cache_key)
+        if data is not None:
+            return Response(data)
+        
+        # Without an explicit ?status= the list shows active products only
+        statuses = None if request.query_params.get('status') else {'active'}
+        data = compute_facets(self.filter_queryset(self.get_queryset()), statuses)
+        cache_set(cache_key, data, FACETS_CACHE_TIMEOUT)
+        return Response(data)
+    
     @action(detail=False, methods=['get'])
     def low_stock(self, request):
         """Get products with low stock (less than 10 items)"""